@@ -4,8 +4,12 @@ import time
 import datetime
 import logging
 import threading
-from flask import Flask, Blueprint, request, render_template, redirect, url_for, jsonify
+import queue
+import functools
+import operator
+from flask import Flask, Blueprint, request, render_template, redirect, url_for, jsonify, send_file
 from werkzeug.utils import secure_filename
+from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 
 # Import dropbox for type checking
@@ -15,6 +19,9 @@ try:
 except ImportError:
     DROPBOX_MODULE_AVAILABLE = False
 
+from json_utils import dump_json_bytes, load_json_file
+from file_utils import write_file_atomic
+
 # Import Dropbox sync module (if available)
 try:
     import dropbox_sync
@@ -42,75 +49,212 @@ logging.basicConfig(
 )
 logger = logging.getLogger("webhook-app")
 
+# Import the sync worker once (if available) instead of inside each handler
+try:
+    import sync_worker
+    SYNC_WORKER_AVAILABLE = True
+except ImportError:
+    SYNC_WORKER_AVAILABLE = False
+
 # Load environment variables from .env file if present
 load_dotenv()
 
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that builds jsonify responses with orjson when installed.
+    Keeps Flask's key sorting, compact/debug formatting and conversion of
+    dates and other types; non-ASCII characters are sent as UTF-8 rather
+    than \\u escapes.
+    """
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = dump_json_bytes(obj, indent=pretty, sort_keys=self.sort_keys, default=self.default)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 # Set application start time for uptime tracking
 app.start_time = time.time()
 
+# Directories already created/verified by this process
+known_dirs = set()
+
+def ensure_dir(path):
+    """
+    Make sure a local directory exists.
+    Each path is only created once per process; later calls skip the syscall.
+    """
+    if path not in known_dirs:
+        os.makedirs(path, exist_ok=True)
+        known_dirs.add(path)
+
 # Data directory for storing JSON submissions
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+ensure_dir(DATA_DIR)
+
+# String values accepted as "true" for boolean flags (env vars, query params, JSON fields)
+TRUTHY_VALUES = frozenset({'true', '1', 't', 'yes', 'y', 'on'})
+
+def to_bool(value):
+    """Interpret an env var, query parameter or JSON value as a boolean flag"""
+    return str(value).lower() in TRUTHY_VALUES
 
 # Check if auto backup is enabled
-ENABLE_AUTO_BACKUP = os.getenv('ENABLE_AUTO_BACKUP', 'False').lower() in ('true', '1', 't')
+ENABLE_AUTO_BACKUP = to_bool(os.getenv('ENABLE_AUTO_BACKUP', 'False'))
+
+# Sync status updates are queued here and applied by a background thread
+# so the webhook request path never blocks on the status file
+SYNC_STATUS_FLUSH_INTERVAL = 0.2  # seconds
+sync_status_queue = queue.Queue()
+sync_status_thread = None
+sync_status_thread_lock = threading.Lock()
+sync_status_apply_lock = threading.Lock()
+
+def _write_sync_status_updates(updates):
+    """Apply a batch of queued updates to the sync status file"""
+    if not SYNC_WORKER_AVAILABLE:
+        logger.debug("sync_worker not available, dropping sync status updates")
+        return
+    
+    try:
+        # A running sync rewrites the status file too; the lock keeps either
+        # side from overwriting the other's changes with a stale copy
+        with sync_worker.sync_status_lock():
+            status = sync_worker.get_sync_status()
+            for update in updates:
+                if update.get("files_synced"):
+                    status["files_synced"] = status.get("files_synced", 0) + update["files_synced"]
+                if update.get("pending_sync"):
+                    if "pending_sync" not in status:
+                        status["pending_sync"] = []
+                    status["pending_sync"].append(update["pending_sync"])
+            sync_worker.update_sync_status(status)
+    except Exception as e:
+        logger.warning(f"Could not apply {len(updates)} sync status updates: {str(e)}")
+
+def _drain_sync_status_queue(updates):
+    """Move every update currently queued onto the updates list"""
+    while True:
+        try:
+            updates.append(sync_status_queue.get_nowait())
+        except queue.Empty:
+            return updates
+
+def _apply_sync_status_updates():
+    """Background loop that applies queued sync status updates in batches"""
+    while True:
+        updates = [sync_status_queue.get()]
+        # Held until the batch is written, so a flush can wait for it
+        with sync_status_apply_lock:
+            # Give concurrent requests a moment to queue more updates
+            time.sleep(SYNC_STATUS_FLUSH_INTERVAL)
+            _write_sync_status_updates(_drain_sync_status_queue(updates))
+
+def flush_sync_status_updates():
+    """
+    Write every queued sync status update now instead of waiting for the
+    background thread, which dies with the process. Called from the Gunicorn
+    worker_exit hook.
+    """
+    with sync_status_apply_lock:
+        updates = _drain_sync_status_queue([])
+        if updates:
+            _write_sync_status_updates(updates)
+
+def queue_sync_status_update(files_synced=0, pending_sync=None):
+    """
+    Queue an update to the sync status without blocking the caller.
+    The background writer thread is started on first use.
+    """
+    global sync_status_thread
+    
+    if sync_status_thread is None:
+        with sync_status_thread_lock:
+            if sync_status_thread is None:
+                sync_status_thread = threading.Thread(target=_apply_sync_status_updates)
+                sync_status_thread.daemon = True
+                sync_status_thread.start()
+    
+    sync_status_queue.put_nowait({
+        "files_synced": files_synced,
+        "pending_sync": pending_sync
+    })
+
+@functools.lru_cache(maxsize=4096)
+def safe_sender(sender):
+    """
+    Sanitize a sender name for use as a directory name.
+    Cached because the set of senders is small and secure_filename is
+    called on every request, often more than once for the same name.
+    """
+    return secure_filename(sender)
+
+def submission_sort_key(submission_id):
+    """
+    Integer sort key for a submission ID.
+    IDs start with a YYYYMMDDHHMMSS timestamp (optionally followed by a suffix
+    such as "_fallback"), so sorting on that prefix orders by creation time.
+    IDs without a numeric prefix sort last.
+    """
+    prefix = submission_id[:14]
+    return int(prefix) if prefix.isdigit() else 0
 
 def get_sender_dirs():
     """Get a list of all sender directories"""
     if not os.path.exists(DATA_DIR):
         return []
-    return [d for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))]
+    with os.scandir(DATA_DIR) as entries:
+        return [entry.name for entry in entries if entry.is_dir()]
 
 def get_sender_submissions(sender):
     """
     Get a list of all submissions for a sender.
     Checks both local storage and Dropbox to ensure completeness.
     """
-    sender = secure_filename(sender)
+    sender = safe_sender(sender)
     submissions = []
     local_ids = set()  # To track IDs we've already seen
     
     # Step 1: Get submissions from local storage first
     sender_dir = os.path.join(DATA_DIR, sender)
     if os.path.exists(sender_dir):
-        for filename in os.listdir(sender_dir):
-            if filename.endswith('.json'):
-                submission_id = filename.replace('.json', '')
-                local_ids.add(submission_id)  # Track this ID
-                
-                file_path = os.path.join(sender_dir, filename)
-                try:
-                    with open(file_path, 'r') as f:
-                        try:
-                            metadata = json.load(f)
-                            submissions.append({
-                                'id': submission_id,
-                                'title': metadata.get('_meta', {}).get('title', 'Untitled'),
-                                'timestamp': metadata.get('_meta', {}).get('timestamp', 'Unknown'),
-                                'size': os.path.getsize(file_path),
-                                'from': 'local'
-                            })
-                        except json.JSONDecodeError:
-                            # Handle corrupted JSON files
-                            submissions.append({
-                                'id': submission_id,
-                                'title': 'Corrupted Data',
-                                'timestamp': 'Unknown',
-                                'size': os.path.getsize(file_path),
-                                'from': 'local',
-                                'corrupted': True
-                            })
-                except Exception as e:
-                    logger.warning(f"Error processing local file {file_path}: {str(e)}")
+        with os.scandir(sender_dir) as entries:
+            file_entries = [entry for entry in entries if entry.name.endswith('.json')]
+        
+        for entry in file_entries:
+            submission_id = entry.name.replace('.json', '')
+            local_ids.add(submission_id)  # Track this ID
+            
+            file_path = entry.path
+            try:
+                with open(file_path, 'r') as f:
+                    try:
+                        metadata = json.load(f)
+                        submissions.append({
+                            'id': submission_id,
+                            'title': metadata.get('_meta', {}).get('title', 'Untitled'),
+                            'timestamp': metadata.get('_meta', {}).get('timestamp', 'Unknown'),
+                            'size': entry.stat().st_size,
+                            'from': 'local'
+                        })
+                    except json.JSONDecodeError:
+                        # Handle corrupted JSON files
+                        submissions.append({
+                            'id': submission_id,
+                            'title': 'Corrupted Data',
+                            'timestamp': 'Unknown',
+                            'size': entry.stat().st_size,
+                            'from': 'local',
+                            'corrupted': True
+                        })
+            except Exception as e:
+                logger.warning(f"Error processing local file {file_path}: {str(e)}")
     
     # Step 2: Check Dropbox for any additional files (if Dropbox is available)
     if DROPBOX_SYNC_AVAILABLE:
         try:
-            # Try to import needed modules
-            import dropbox_sync
-            
             # Get Dropbox client
             dbx = dropbox_sync.get_dropbox_client()
             
@@ -135,7 +279,7 @@ def get_sender_submissions(sender):
                         # This file exists in Dropbox but not locally
                         try:
                             # Download the file from Dropbox
-                            dropbox_file_path = f"{dropbox_sender_path}/{file.name}"
+                            dropbox_file_path = dropbox_sender_path + '/' + file.name
                             metadata, response = dbx.files_download(dropbox_file_path)
                             file_content = response.content
                             
@@ -155,12 +299,11 @@ def get_sender_submissions(sender):
                                 # Save locally for future access
                                 try:
                                     # Ensure the local directory exists
-                                    local_file_path = os.path.join(DATA_DIR, sender, file.name)
-                                    os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+                                    ensure_dir(sender_dir)
+                                    local_file_path = sender_dir + os.sep + file.name
                                     
                                     # Save to local file
-                                    with open(local_file_path, 'wb') as f:
-                                        f.write(file_content)
+                                    write_file_atomic(local_file_path, file_content)
                                         
                                     logger.info(f"Downloaded submission from Dropbox to local: {submission_id}")
                                 except Exception as save_e:
@@ -185,28 +328,26 @@ def get_sender_submissions(sender):
         except Exception as e:
             logger.warning(f"Error checking Dropbox for submissions: {str(e)}")
     
-    # Sort by timestamp (newest first)
-    submissions.sort(key=lambda x: x['timestamp'], reverse=True)
-    return submissions
+    # Sort by the timestamp encoded in the submission ID (newest first)
+    keyed_submissions = [(submission_sort_key(s['id']), s) for s in submissions]
+    keyed_submissions.sort(key=operator.itemgetter(0), reverse=True)
+    return [s for _, s in keyed_submissions]
 
 def get_submission_data(sender, submission_id):
     """
     Get the data for a specific submission.
     Checks local storage first, then Dropbox if not found locally.
     """
-    sender = secure_filename(sender)
+    sender = safe_sender(sender)
     file_path = os.path.join(DATA_DIR, sender, f"{submission_id}.json")
     
     # First, try to get from local storage
     if os.path.exists(file_path):
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                # Remove metadata from the returned data
-                if '_meta' in data:
-                    data_without_meta = {k: v for k, v in data.items() if k != '_meta'}
-                    return data_without_meta
-                return data
+            data = load_json_file(file_path)
+            # Remove metadata from the returned data (freshly parsed, so safe to modify)
+            data.pop('_meta', None)
+            return data
         except json.JSONDecodeError:
             logger.warning(f"Corrupted local JSON file: {file_path}")
             # Don't return error yet - try Dropbox first
@@ -214,11 +355,6 @@ def get_submission_data(sender, submission_id):
     # If not found locally or corrupted, try Dropbox if available
     if DROPBOX_SYNC_AVAILABLE:
         try:
-            # Try to import the needed modules
-            import dropbox_sync
-            import dropbox_primary
-            import io
-            
             logger.info(f"File not found locally, checking Dropbox: {sender}/{submission_id}")
             
             # Get the Dropbox client
@@ -239,20 +375,17 @@ def get_submission_data(sender, submission_id):
                 # Save a local copy for future access
                 try:
                     # Ensure the local directory exists
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                    ensure_dir(os.path.dirname(file_path))
                     
                     # Save to local file
-                    with open(file_path, 'wb') as f:
-                        f.write(file_content)
+                    write_file_atomic(file_path, file_content)
                     
                     logger.info(f"Downloaded and saved file from Dropbox to local: {file_path}")
                 except Exception as save_e:
                     logger.warning(f"Could not save Dropbox file to local storage: {str(save_e)}")
                 
-                # Remove metadata from the returned data
-                if '_meta' in data:
-                    data_without_meta = {k: v for k, v in data.items() if k != '_meta'}
-                    return data_without_meta
+                # Remove metadata from the returned data (freshly parsed, so safe to modify)
+                data.pop('_meta', None)
                 return data
                 
             except Exception as download_e:
@@ -273,14 +406,14 @@ def index():
 @app.route('/sender/<sender>')
 def view_sender(sender):
     """Page showing all submissions for a specific sender"""
-    sender = secure_filename(sender)
+    sender = safe_sender(sender)
     submissions = get_sender_submissions(sender)
     return render_template('sender.html', sender=sender, submissions=submissions)
 
 @app.route('/submission/<sender>/<submission_id>')
 def view_submission(sender, submission_id):
     """Page showing a specific submission"""
-    sender = secure_filename(sender)
+    sender = safe_sender(sender)
     data = get_submission_data(sender, submission_id)
     if data is None:
         return redirect(url_for('index'))
@@ -306,14 +439,14 @@ def webhook():
     data = request.json
     
     # Check for debug mode and sync options in the request
-    debug_mode = data.get('debug_dropbox', False)
-    verify_upload = data.get('verify_upload', True)
+    debug_mode = to_bool(data.get('debug_dropbox', False))
+    verify_upload = to_bool(data.get('verify_upload', True))
     max_retries = int(data.get('max_retries', 3))
-    sync_to_local = data.get('sync_to_local', True)  # Whether to sync to local storage
+    sync_to_local = to_bool(data.get('sync_to_local', True))  # Whether to sync to local storage
     
     # Extract sender from data or use IP address
     sender = data.get('sender', request.remote_addr)
-    sender = secure_filename(sender)
+    sender = safe_sender(sender)
     
     # Add IP address to the metadata
     data_to_store = data.copy()
@@ -387,16 +520,9 @@ def webhook():
         if debug_mode:
             logger.info(f"Dropbox save details: {json.dumps(result.get('dropbox', {}).get('details', {}))}")
         
-        # Update sync statistics if possible
+        # Update sync statistics in the background
         if result['success'] and DROPBOX_SYNC_AVAILABLE:
-            try:
-                import sync_worker
-                status = sync_worker.get_sync_status()
-                status["files_synced"] = status.get("files_synced", 0) + 1
-                sync_worker.update_sync_status(status)
-            except (ImportError, Exception) as e:
-                if debug_mode:
-                    logger.debug(f"Could not update sync statistics: {str(e)}")
+            queue_sync_status_update(files_synced=1)
                 
     except Exception as e:
         error_msg = f"Error processing webhook data with Dropbox primary storage: {str(e)}"
@@ -408,16 +534,14 @@ def webhook():
         try:
             # Create directory for this sender if needed
             sender_dir = os.path.join(DATA_DIR, sender)
-            if not os.path.exists(sender_dir):
-                os.makedirs(sender_dir)
-                
+            ensure_dir(sender_dir)
+            
             # Generate a unique ID for this submission
             fallback_id = datetime.datetime.now().strftime('%Y%m%d%H%M%S_fallback')
             
             # Save the data to a local file as fallback
             file_path = os.path.join(sender_dir, f"{fallback_id}.json")
-            with open(file_path, 'w') as f:
-                json.dump(data_to_store, f, indent=2)
+            write_file_atomic(file_path, json.dumps(data_to_store, indent=2).encode('utf-8'))
                 
             logger.info(f"Saved fallback copy to local storage: {file_path}")
             response["fallback_id"] = fallback_id
@@ -425,26 +549,19 @@ def webhook():
             response["url"] = url_for('view_submission', sender=sender, submission_id=fallback_id, _external=True)
             
             # Queue for later sync to Dropbox
-            try:
-                import sync_worker
+            if SYNC_WORKER_AVAILABLE:
                 logger.info(f"Queuing fallback file for later sync to Dropbox: {sender}/{fallback_id}")
                 
                 # Record the fallback file in sync status
-                status = sync_worker.get_sync_status()
-                if "pending_sync" not in status:
-                    status["pending_sync"] = []
-                
-                status["pending_sync"].append({
+                queue_sync_status_update(pending_sync={
                     "sender": sender,
                     "submission_id": fallback_id,
                     "timestamp": datetime.datetime.now().isoformat(),
                     "is_fallback": True,
                     "error": error_msg
                 })
-                
-                sync_worker.update_sync_status(status)
                 response["queued_for_sync"] = True
-            except ImportError:
+            else:
                 logger.debug("sync_worker not available for fallback queuing")
                 
         except Exception as fallback_error:
@@ -480,7 +597,7 @@ def list_senders_api():
 @app.route('/api/data/<sender>')
 def list_submissions_api(sender):
     """API endpoint to list all submissions for a sender"""
-    sender = secure_filename(sender)
+    sender = safe_sender(sender)
     submissions = get_sender_submissions(sender)
     data = {"sender": sender, "submissions": submissions}
     
@@ -496,8 +613,28 @@ def list_submissions_api(sender):
 
 @app.route('/api/data/<sender>/<submission_id>')
 def get_submission_api(sender, submission_id):
-    """API endpoint to get a specific submission"""
-    sender = secure_filename(sender)
+    """
+    API endpoint to get a specific submission
+    
+    Query parameters:
+    - raw: "true" to return the stored file unmodified (including _meta),
+      served straight from disk with conditional request support. A file
+      that is only in Dropbox is downloaded to local storage first.
+    """
+    sender = safe_sender(sender)
+    
+    # Serve the stored file as-is without parsing it in Python
+    if to_bool(request.args.get('raw', 'false')):
+        file_path = os.path.join(DATA_DIR, sender, f"{submission_id}.json")
+        if not os.path.exists(file_path):
+            # Looking the submission up fetches it from Dropbox and keeps a
+            # local copy
+            if get_submission_data(sender, submission_id) is None:
+                return jsonify({"error": "Submission not found"}), 404
+            if not os.path.exists(file_path):
+                return jsonify({"error": "Raw submission file could not be stored locally"}), 500
+        return send_file(file_path, mimetype='application/json', conditional=True)
+    
     data = get_submission_data(sender, submission_id)
     if data is None:
         return jsonify({"error": "Submission not found"}), 404
@@ -526,10 +663,7 @@ def sync_data():
     - verify: "true" or "false" - whether to verify uploads/downloads (default: true)
     - format: "html" or "json" - response format (default based on Accept header)
     """
-    try:
-        # Import the sync worker
-        import sync_worker
-    except ImportError:
+    if not SYNC_WORKER_AVAILABLE:
         error = {"error": "Sync worker module not available"}
         return jsonify(error), 500
     
@@ -538,8 +672,8 @@ def sync_data():
     if direction not in ['both', 'to_dropbox', 'from_dropbox']:
         direction = 'both'
         
-    force = request.args.get('force', 'false').lower() in ['true', '1', 't', 'yes']
-    verify = request.args.get('verify', 'true').lower() in ['true', '1', 't', 'yes']
+    force = to_bool(request.args.get('force', 'false'))
+    verify = to_bool(request.args.get('verify', 'true'))
     
     # Handle different sync directions
     logger.info(f"Manual sync triggered: direction={direction}, force={force}, verify={verify}")
@@ -594,10 +728,7 @@ def get_sync_status():
     Get the current status of Dropbox synchronization.
     Shows sync history, statistics, and current state.
     """
-    try:
-        # Import the sync worker
-        import sync_worker
-    except ImportError:
+    if not SYNC_WORKER_AVAILABLE:
         error = {"error": "Sync worker module not available"}
         return jsonify(error), 500
     
@@ -631,7 +762,7 @@ def test_dropbox_connection():
             "auto_backup_enabled": ENABLE_AUTO_BACKUP
         }), 500
     
-    debug = request.args.get('debug', 'false').lower() == 'true'
+    debug = to_bool(request.args.get('debug', 'false'))
     test_folder = request.args.get('folder', None)
     
     result = {
@@ -725,8 +856,18 @@ def test_dropbox_connection():
         result["diagnostics"].append(f"Listing contents of backup folder...")
         try:
             folder_content = dropbox_sync.list_dropbox_files(dbx, dropbox_sync.DROPBOX_BACKUP_FOLDER)
-            folders = [f.name for f in folder_content if isinstance(f, dropbox.files.FolderMetadata)]
-            files = [f.name for f in folder_content if isinstance(f, dropbox.files.FileMetadata)]
+            
+            # Split folders and files in a single pass over the listing
+            folders = []
+            files = []
+            folder_type = dropbox.files.FolderMetadata
+            file_type = dropbox.files.FileMetadata
+            for entry in folder_content:
+                entry_type = type(entry)
+                if entry_type is folder_type:
+                    folders.append(entry.name)
+                elif entry_type is file_type:
+                    files.append(entry.name)
             
             result["details"]["backup_folder_contents"] = {
                 "folders": folders,
@@ -750,25 +891,28 @@ def test_dropbox_connection():
         result["error"] = f"Test failed: {str(e)}"
         return jsonify(result), 500
 
+# Parts of the health check response that don't change while the app runs
+HEALTH_STATUS_STATIC = {
+    "status": "healthy",
+    "version": "1.0.0",
+    "environment": {
+        "python_version": os.environ.get("PYTHON_VERSION", "Unknown"),
+        "flask_version": getattr(Flask, "__version__", "Unknown"),
+        "render": os.environ.get("RENDER", "Not set"),
+        "port": os.environ.get("PORT", "5000")
+    }
+}
+
 # Health check endpoint
 @app.route('/health')
 def health_check():
     """Health check endpoint providing basic application status"""
     # Basic health check - could be expanded to check database, Dropbox connection, etc.
-    status = {
-        "status": "healthy",
-        "timestamp": datetime.datetime.now().isoformat(),
-        "version": "1.0.0",
-        "uptime": int(time.time() - app.start_time) if hasattr(app, 'start_time') else 0,
-        "environment": {
-            "python_version": os.environ.get("PYTHON_VERSION", "Unknown"),
-            "flask_version": getattr(Flask, "__version__", "Unknown"),
-            "render": os.environ.get("RENDER", "Not set"),
-            "port": os.environ.get("PORT", "5000")
-        }
-    }
+    status = HEALTH_STATUS_STATIC.copy()
+    status["timestamp"] = datetime.datetime.now().isoformat()
+    status["uptime"] = int(time.time() - app.start_time)
     
-    logger.info(f"Health check requested from {request.remote_addr}")
+    logger.info("Health check requested from %s", request.remote_addr)
     
     return jsonify(status)
 
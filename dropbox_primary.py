@@ -9,22 +9,33 @@ Features:
 - Maintaining proper folder structure in Dropbox
 - Syncing from Dropbox to local storage
 - Robust error handling and verification
+- Batched commits so bursts of submissions don't hit write rate limits
 """
 
 import os
 import json
-import datetime
 import time
+import datetime
 import logging
-import hashlib
-import io
-from pathlib import Path
+import hmac
+import queue
+import threading
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import dropbox
-from dropbox.exceptions import ApiError, AuthError
+from dropbox.exceptions import AuthError
 from dropbox.files import WriteMode
 
+# Use orjson for faster serialization if available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Import the existing dropbox sync module
 import dropbox_sync
+from file_utils import write_file_atomic
 
 # Configure logging
 logger = logging.getLogger("dropbox-primary")
@@ -36,7 +47,229 @@ DROPBOX_REFRESH_TOKEN = dropbox_sync.DROPBOX_REFRESH_TOKEN
 DROPBOX_BACKUP_FOLDER = dropbox_sync.DROPBOX_BACKUP_FOLDER
 DATA_DIR = dropbox_sync.DATA_DIR
 
-def save_data_to_dropbox(data, sender, submission_id=None, debug=False, max_retries=3, verify=True):
+# Prefix shared by every sender folder in Dropbox
+DROPBOX_PATH_PREFIX = DROPBOX_BACKUP_FOLDER.rstrip('/') + '/'
+
+@functools.lru_cache(maxsize=4096)
+def dropbox_sender_path(sender):
+    """
+    Get the Dropbox folder for a sender.
+    
+    Cached so repeat senders reuse the same path string instead of
+    building a new one for every submission.
+    
+    Args:
+        sender (str): The sender identifier
+        
+    Returns:
+        str: The sender's folder path in Dropbox
+    """
+    return DROPBOX_PATH_PREFIX + sender
+
+def current_timestamps():
+    """
+    Read the clock once and format it both ways a submission needs.
+    
+    Returns:
+        tuple: (submission ID as YYYYMMDDHHMMSS, ISO 8601 timestamp with
+               microseconds), both in local time from the same reading
+    """
+    now = datetime.datetime.now()
+    return now.strftime('%Y%m%d%H%M%S'), now.isoformat()
+
+def serialize_json(data):
+    """
+    Serialize data to indented JSON bytes.
+    Uses orjson when installed (encodes straight to bytes), falling back to the
+    standard library for anything orjson can't handle, such as integers
+    larger than 64 bits.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass
+    return json.dumps(data, indent=2).encode('utf-8')
+
+# Shutdown signal shared with dropbox_sync, so retry waits in both modules are
+# cut short together
+shutdown_event = dropbox_sync.shutdown_event
+wait_before_retry = dropbox_sync.wait_before_retry
+
+# Pool for work that can overlap with upload verification (e.g. local sync)
+background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dropbox-background")
+
+class BatchCommitError(Exception):
+    """Dropbox rejected one entry of an otherwise successful batch commit"""
+
+class BatchUploader:
+    """
+    Commits uploads to Dropbox in batches.
+    
+    The content of each file is sent in its own (closed) upload session, then a
+    background thread commits all pending sessions with a single
+    files_upload_session_finish_batch_v2 call. Dropbox counts one write
+    operation per batch instead of one per file, which avoids
+    too_many_write_operations errors when many webhooks arrive at once.
+    """
+    
+    # Dropbox accepts at most 1000 entries per finish_batch call
+    MAX_BATCH_SIZE = 1000
+    
+    # Seconds a request waits for its batch to be committed before giving up
+    COMMIT_TIMEOUT = 120
+    
+    def __init__(self, flush_interval=0.25):
+        """
+        Args:
+            flush_interval (float): Seconds to wait for more uploads before committing a batch
+        """
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        self.worker = None
+        self.worker_lock = threading.Lock()
+    
+    def upload(self, dbx, file_content, dropbox_path, timeout=COMMIT_TIMEOUT):
+        """
+        Upload bytes to Dropbox and wait until the batch containing them is committed.
+        
+        Args:
+            dbx: Dropbox client instance
+            file_content (bytes): The file content to upload
+            dropbox_path (str): Destination path in Dropbox (overwritten if it exists)
+            timeout (float): Maximum seconds to wait for the commit
+            
+        Returns:
+            dropbox.files.FileMetadata: Metadata of the committed file
+            
+        Raises:
+            concurrent.futures.TimeoutError: If the batch wasn't committed in time
+            Exception: If the upload or the batch commit failed
+        """
+        return self.submit(dbx, file_content, dropbox_path).result(timeout)
+    
+    def submit(self, dbx, file_content, dropbox_path):
+        """
+        Upload bytes to Dropbox and queue them for the next batch commit.
+        
+        Returns:
+            concurrent.futures.Future: Resolves to the committed file's FileMetadata
+        """
+        session_id = dropbox_sync.start_upload_session(dbx, file_content)
+        entry = dropbox.files.UploadSessionFinishArg(
+            cursor=dropbox.files.UploadSessionCursor(
+                session_id=session_id,
+                offset=len(file_content)
+            ),
+            commit=dropbox.files.CommitInfo(path=dropbox_path, mode=WriteMode.overwrite, mute=True)
+        )
+        
+        future = Future()
+        self.start_worker()
+        self.pending.put((dbx, entry, future))
+        return future
+    
+    def start_worker(self):
+        """Start the background commit thread if it isn't running (or has died)"""
+        if self.worker is None or not self.worker.is_alive():
+            with self.worker_lock:
+                if self.worker is None or not self.worker.is_alive():
+                    self.worker = threading.Thread(target=self.run, name="dropbox-batch-uploader")
+                    self.worker.daemon = True
+                    self.worker.start()
+    
+    def run(self):
+        """Background loop collecting pending uploads and committing them in batches"""
+        while True:
+            batch = [self.pending.get()]
+            try:
+                # Give concurrent uploads a moment to join this batch
+                time.sleep(self.flush_interval)
+                while len(batch) < self.MAX_BATCH_SIZE:
+                    try:
+                        batch.append(self.pending.get_nowait())
+                    except queue.Empty:
+                        break
+                self.commit(batch)
+            except BaseException as e:
+                # Never leave a request waiting on a batch this thread can no
+                # longer commit; the next submit starts a fresh worker
+                logger.error("Batch uploader stopped: %s", e)
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                raise
+    
+    def commit(self, batch):
+        """Commit a batch of finished upload sessions and resolve their futures"""
+        # All clients use the same account; the most recent one has the freshest token
+        dbx = batch[-1][0]
+        logger.info("Committing batch of %s uploads to Dropbox", len(batch))
+        
+        try:
+            result = dropbox_sync.call_dropbox(
+                dbx.files_upload_session_finish_batch_v2, [entry for _, entry, _ in batch]
+            )
+        except Exception as e:
+            logger.error("Batch commit of %s uploads failed: %s", len(batch), e)
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        
+        for (_, entry, future), entry_result in zip(batch, result.entries):
+            if entry_result.is_success():
+                future.set_result(entry_result.get_success())
+            else:
+                future.set_exception(BatchCommitError(
+                    f"Failed to commit {entry.commit.path}: {entry_result.get_failure()}"
+                ))
+
+# Shared uploader so concurrent requests end up in the same batch
+batch_uploader = BatchUploader()
+
+class UploadResult:
+    """
+    Outcome of a single upload, built up while save_data_to_dropbox runs.
+    
+    Slots keep the per-request object small and attribute access cheap;
+    to_dict converts it to the JSON-ready form used in webhook responses.
+    Fields can also be read by key (result['success'], result.get('error')),
+    so callers written against the old dict return value keep working.
+    """
+    __slots__ = ('success', 'error', 'dropbox_path', 'submission_id', 'verified', 'retries', 'details')
+    
+    def __init__(self):
+        self.success = False
+        self.error = None
+        self.dropbox_path = None
+        self.submission_id = None
+        self.verified = False
+        self.retries = 0
+        self.details = {}
+    
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key, default=None):
+        """Return a field by name, or default if there is no such field"""
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def to_dict(self):
+        """Return the result as a plain dict without deep-copying the details"""
+        return {
+            'success': self.success,
+            'error': self.error,
+            'details': self.details,
+            'dropbox_path': self.dropbox_path,
+            'submission_id': self.submission_id,
+            'verified': self.verified,
+            'retries': self.retries
+        }
+
+def save_data_to_dropbox(data, sender, submission_id=None, debug=False, max_retries=3, verify=True,
+                         on_uploaded=None, deep_verify=False):
     """
     Save JSON data directly to Dropbox as the primary storage.
     
@@ -46,55 +279,55 @@ def save_data_to_dropbox(data, sender, submission_id=None, debug=False, max_retr
         submission_id (str, optional): Custom submission ID. If None, generates one.
         debug (bool): Enable verbose logging
         max_retries (int): Maximum retry attempts for failed uploads
-        verify (bool): Whether to verify the uploaded file
+        verify (bool): Whether to verify the uploaded file by its Dropbox content hash
+        on_uploaded (callable, optional): Called with the submission ID and the
+            uploaded bytes as soon as the upload succeeds, before verification,
+            so callers can start follow-up work in parallel with it
+        deep_verify (bool): Also download the uploaded file and compare its content
         
     Returns:
-        dict: Result information including success status, file path, and details
+        UploadResult: Result information including success status, file path, and
+            details; fields can be read as attributes or by key like the dict
+            this used to return
     """
     # Prepare result tracking
-    result = {
-        'success': False,
-        'error': None,
-        'details': {},
-        'dropbox_path': None,
-        'submission_id': None,
-        'verified': False,
-        'retries': 0
-    }
+    result = UploadResult()
+    details = result.details
     
     # Generate a submission ID if not provided
+    generated_id, timestamp = current_timestamps()
     if not submission_id:
-        submission_id = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+        submission_id = generated_id
     
-    result['submission_id'] = submission_id
+    result.submission_id = submission_id
     
     if debug:
-        logger.info(f"Saving data directly to Dropbox for sender {sender}, submission {submission_id}")
+        logger.info("Saving data directly to Dropbox for sender %s, submission %s", sender, submission_id)
     
     # Prepare metadata
     if '_meta' not in data:
         data['_meta'] = {
-            'timestamp': datetime.datetime.now().isoformat(),
+            'timestamp': timestamp,
             'title': data.get('title', f"Submission {submission_id}"),
             'direct_to_dropbox': True
         }
     
     # Convert the data to JSON string
     try:
-        file_content = json.dumps(data, indent=2).encode('utf-8')
+        file_content = serialize_json(data)
         file_size = len(file_content)
-        result['details']['file_size'] = file_size
+        details['file_size'] = file_size
         
-        # Calculate file hash for verification
+        # Calculate the Dropbox content hash for verification
         if verify:
-            file_hash = hashlib.md5(file_content).hexdigest()
-            result['details']['file_hash'] = file_hash
+            file_hash = dropbox_sync.dropbox_content_hash(file_content)
+            details['file_hash'] = file_hash
             if debug:
-                logger.info(f"File hash: {file_hash}")
+                logger.info("File hash: %s", file_hash)
     except Exception as e:
         error_msg = f"Error preparing JSON data: {str(e)}"
         logger.error(error_msg)
-        result['error'] = error_msg
+        result.error = error_msg
         return result
     
     # Get Dropbox client
@@ -104,72 +337,66 @@ def save_data_to_dropbox(data, sender, submission_id=None, debug=False, max_retr
         
         try:
             dbx = dropbox_sync.get_dropbox_client(debug=debug)
-            result['details']['client_obtained'] = True
+            details['client_obtained'] = True
         except Exception as e:
             error_msg = f"Failed to get Dropbox client: {str(e)}"
             logger.error(error_msg)
-            result['error'] = error_msg
-            result['details']['client_error'] = str(e)
+            result.error = error_msg
+            details['client_error'] = str(e)
             return result
     except Exception as e:
         error_msg = f"Unexpected error getting Dropbox client: {str(e)}"
         logger.error(error_msg)
-        result['error'] = error_msg
+        result.error = error_msg
         return result
     
-    # Ensure the proper folder structure exists in Dropbox
-    try:
-        # Create the path for this sender
-        dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender}"
-        
-        # Use the path creator function from dropbox_sync
-        path_created = dropbox_sync.create_dropbox_path(dbx, dropbox_sender_path, debug=debug)
-        if not path_created:
-            error_msg = f"Failed to create path in Dropbox: {dropbox_sender_path}"
-            logger.error(error_msg)
-            result['error'] = error_msg
-            result['details']['path_creation_failed'] = True
-            return result
-            
-        result['details']['path_created'] = True
-    except Exception as e:
-        error_msg = f"Error creating Dropbox folder structure: {str(e)}"
-        logger.error(error_msg)
-        result['error'] = error_msg
-        return result
+    # The path for this sender. Dropbox creates missing parent folders when
+    # the upload is committed, so there's no need to create it up front.
+    sender_path = dropbox_sender_path(sender)
     
     # Set the full Dropbox file path
-    dropbox_file_path = f"{dropbox_sender_path}/{submission_id}.json"
-    result['dropbox_path'] = dropbox_file_path
+    dropbox_file_path = f"{sender_path}/{submission_id}.json"
+    result.dropbox_path = dropbox_file_path
     
     # Upload with retries
     retry_count = 0
     upload_success = False
     upload_error = None
+    last_exception = None
     
     while not upload_success and retry_count <= max_retries:
         try:
             if retry_count > 0:
-                logger.info(f"Retry attempt {retry_count} of {max_retries}")
-                # Wait longer between retries (exponential backoff)
-                wait_time = min(2 ** retry_count, 30)  # Max 30 seconds
-                time.sleep(wait_time)
+                # Honour Retry-After on rate limits, otherwise back off exponentially
+                wait_time = dropbox_sync.get_retry_delay(last_exception, retry_count)
+                logger.info("Retry attempt %s of %s in %.1fs", retry_count, max_retries, wait_time)
+                if not wait_before_retry(wait_time):
+                    error_msg = f"Upload to Dropbox abandoned during shutdown: {upload_error}"
+                    logger.error(error_msg)
+                    result.error = error_msg
+                    result.retries = retry_count
+                    return result
+                
+                # In case the failure was caused by the folder structure,
+                # make sure the sender folder exists before trying again
+                try:
+                    if dropbox_sync.create_dropbox_path(dbx, sender_path, debug=debug):
+                        details['path_created'] = True
+                except Exception as path_error:
+                    logger.warning("Could not ensure Dropbox folder %s: %s", sender_path, path_error)
             
             if debug:
-                logger.info(f"Uploading data to {dropbox_file_path} ({file_size} bytes)")
+                logger.info("Uploading data to %s (%s bytes)", dropbox_file_path, file_size)
             
-            # Upload the file to Dropbox directly from memory
-            upload_result = dbx.files_upload(
-                file_content,
-                dropbox_file_path,
-                mode=WriteMode.overwrite
-            )
+            # Upload the file to Dropbox directly from memory, committed
+            # together with any other submissions arriving at the same time
+            upload_result = batch_uploader.upload(dbx, file_content, dropbox_file_path)
             
             if debug:
-                logger.info(f"Upload successful: {upload_result.path_display}")
+                logger.info("Upload successful: %s", upload_result.path_display)
             
             upload_success = True
-            result['details']['upload_result'] = {
+            details['upload_result'] = {
                 'path_display': upload_result.path_display,
                 'id': upload_result.id
             }
@@ -177,50 +404,121 @@ def save_data_to_dropbox(data, sender, submission_id=None, debug=False, max_retr
         except Exception as e:
             retry_count += 1
             upload_error = str(e)
-            logger.warning(f"Upload attempt {retry_count} failed: {upload_error}")
+            last_exception = e
+            logger.warning("Upload attempt %s failed: %s", retry_count, upload_error)
+            
+            # Retrying can't fix an authentication problem
+            if isinstance(e, AuthError):
+                dropbox_sync.reset_dropbox_client()
+                error_msg = f"Authentication error uploading to Dropbox: {upload_error}"
+                logger.error(error_msg)
+                result.error = error_msg
+                result.retries = retry_count
+                return result
+            
+            # Connection errors and rate limits have already been retried by
+            # dropbox_sync.call_dropbox; only a rejected or timed out batch
+            # commit is worth uploading again
+            if not isinstance(e, (BatchCommitError, FutureTimeoutError)):
+                error_msg = f"Failed to upload to Dropbox: {upload_error}"
+                logger.error(error_msg)
+                result.error = error_msg
+                result.retries = retry_count
+                return result
             
             if retry_count > max_retries:
                 error_msg = f"Failed to upload to Dropbox after {max_retries} attempts: {upload_error}"
                 logger.error(error_msg)
-                result['error'] = error_msg
-                result['retries'] = retry_count
+                result.error = error_msg
+                result.retries = retry_count
                 return result
     
-    result['retries'] = retry_count
+    result.retries = retry_count
+    
+    if on_uploaded is not None:
+        on_uploaded(submission_id, file_content)
     
     # Verify the upload if requested
     if verify and upload_success:
         try:
             if debug:
-                logger.info(f"Verifying file upload to {dropbox_file_path}")
+                logger.info("Verifying file upload to %s", dropbox_file_path)
             
-            # Download the file to verify content
-            metadata, response = dbx.files_download(dropbox_file_path)
-            dropbox_content = response.content
+            # The upload result already carries Dropbox's content hash and size
+            dropbox_hash = upload_result.content_hash
+            dropbox_size = upload_result.size
             
-            # Calculate hash for downloaded content
-            dropbox_hash = hashlib.md5(dropbox_content).hexdigest()
-            result['details']['dropbox_hash'] = dropbox_hash
+            # Optionally download the file and hash what is actually stored
+            if deep_verify:
+                metadata, response = dropbox_sync.call_dropbox(dbx.files_download, dropbox_file_path)
+                dropbox_content = response.content
+                dropbox_hash = dropbox_sync.dropbox_content_hash(dropbox_content)
+                dropbox_size = len(dropbox_content)
+            
+            details['dropbox_hash'] = dropbox_hash
             
             # Compare file sizes and hashes
-            if len(dropbox_content) == file_size and dropbox_hash == file_hash:
-                result['verified'] = True
+            if dropbox_size == file_size and hmac.compare_digest(dropbox_hash, file_hash):
+                result.verified = True
                 if debug:
                     logger.info("File verification successful - content matches")
             else:
                 if debug:
                     logger.warning("File verification failed - content does not match")
-                    logger.warning(f"Original size: {file_size}, Dropbox size: {len(dropbox_content)}")
-                    logger.warning(f"Original hash: {file_hash}, Dropbox hash: {dropbox_hash}")
+                    logger.warning("Original size: %s, Dropbox size: %s", file_size, dropbox_size)
+                    logger.warning("Original hash: %s, Dropbox hash: %s", file_hash, dropbox_hash)
                 # We don't fail the operation if verification fails, just report it
-                result['details']['verification_failed'] = True
+                details['verification_failed'] = True
         
         except Exception as e:
-            logger.warning(f"Error during file verification: {str(e)}")
-            result['details']['verification_error'] = str(e)
+            logger.warning("Error during file verification: %s", e)
+            details['verification_error'] = str(e)
     
     # Mark as successful
-    result['success'] = upload_success
+    result.success = upload_success
+    
+    return result
+
+def save_to_local(sender, submission_id, file_content, debug=False):
+    """
+    Write the bytes just uploaded to Dropbox to local storage.
+    Avoids downloading the file again when we already hold its content.
+    
+    Args:
+        sender (str): The sender identifier
+        submission_id (str): The submission ID
+        file_content (bytes): The uploaded file content
+        debug (bool): Enable verbose logging
+        
+    Returns:
+        dict: Result including success status and file path (same shape as
+              sync_from_dropbox_to_local)
+    """
+    result = {
+        'success': False,
+        'error': None,
+        'details': {},
+        'local_path': None
+    }
+    
+    local_sender_dir = os.path.join(DATA_DIR, sender)
+    local_file_path = os.path.join(local_sender_dir, f"{submission_id}.json")
+    result['local_path'] = local_file_path
+    
+    try:
+        os.makedirs(local_sender_dir, exist_ok=True)
+        # Written atomically, so readers never see a partially written submission
+        write_file_atomic(local_file_path, file_content)
+        
+        if debug:
+            logger.info("Saved uploaded content to local storage: %s", local_file_path)
+        
+        result['success'] = True
+        result['details']['file_size'] = len(file_content)
+    except Exception as e:
+        error_msg = f"Error saving file to local storage: {str(e)}"
+        logger.error(error_msg)
+        result['error'] = error_msg
     
     return result
 
@@ -244,11 +542,10 @@ def sync_from_dropbox_to_local(sender, submission_id, debug=False):
     }
     
     if debug:
-        logger.info(f"Syncing from Dropbox to local storage: {sender}/{submission_id}")
+        logger.info("Syncing from Dropbox to local storage: %s/%s", sender, submission_id)
     
     # Construct the Dropbox path
-    dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender}"
-    dropbox_file_path = f"{dropbox_sender_path}/{submission_id}.json"
+    dropbox_file_path = f"{dropbox_sender_path(sender)}/{submission_id}.json"
     
     # Construct the local path
     local_sender_dir = os.path.join(DATA_DIR, sender)
@@ -268,7 +565,7 @@ def sync_from_dropbox_to_local(sender, submission_id, debug=False):
     try:
         os.makedirs(local_sender_dir, exist_ok=True)
         if debug:
-            logger.info(f"Ensured local directory exists: {local_sender_dir}")
+            logger.info("Ensured local directory exists: %s", local_sender_dir)
     except Exception as e:
         error_msg = f"Failed to create local directory: {str(e)}"
         logger.error(error_msg)
@@ -278,17 +575,13 @@ def sync_from_dropbox_to_local(sender, submission_id, debug=False):
     # Download the file from Dropbox
     try:
         if debug:
-            logger.info(f"Downloading {dropbox_file_path} to {local_file_path}")
+            logger.info("Downloading %s to %s", dropbox_file_path, local_file_path)
         
-        metadata, response = dbx.files_download(dropbox_file_path)
-        file_content = response.content
-        
-        # Save to local file
-        with open(local_file_path, 'wb') as f:
-            f.write(file_content)
+        # Stream the file straight to disk instead of buffering it in memory
+        metadata = dropbox_sync.call_dropbox(dbx.files_download_to_file, local_file_path, dropbox_file_path)
         
         if debug:
-            logger.info(f"Successfully downloaded file to {local_file_path}")
+            logger.info("Successfully downloaded file to %s", local_file_path)
         
         # Check if the file was saved correctly
         if os.path.exists(local_file_path):
@@ -330,31 +623,42 @@ def save_webhook_data(data, sender, debug=False, sync_to_local=True, verify=True
         'submission_id': None
     }
     
+    # Step 2 (sync to local) only needs the upload to have finished, so it is
+    # started from the upload callback and runs while the upload is verified.
+    # The local copy is written from the bytes we just uploaded rather than
+    # downloaded back from Dropbox.
+    local_future = None
+    
+    def start_local_sync(submission_id, file_content):
+        nonlocal local_future
+        local_future = background_executor.submit(
+            save_to_local, sender, submission_id, file_content, debug=debug
+        )
+    
     # Step 1: Save to Dropbox
-    dropbox_result = save_data_to_dropbox(data, sender, debug=debug, verify=verify)
-    result['dropbox'] = dropbox_result
-    result['submission_id'] = dropbox_result['submission_id']
+    dropbox_result = save_data_to_dropbox(
+        data, sender, debug=debug, verify=verify,
+        on_uploaded=start_local_sync if sync_to_local else None
+    )
+    result['dropbox'] = dropbox_result.to_dict()
+    result['submission_id'] = dropbox_result.submission_id
     
     # If saving to Dropbox failed, abort the whole operation
-    if not dropbox_result['success']:
-        result['error'] = f"Failed to save to Dropbox: {dropbox_result.get('error', 'Unknown error')}"
+    if not dropbox_result.success:
+        result['error'] = f"Failed to save to Dropbox: {dropbox_result.error or 'Unknown error'}"
         return result
     
     # Step 2: Sync to local storage if requested
     if sync_to_local:
-        local_result = sync_from_dropbox_to_local(
-            sender, 
-            dropbox_result['submission_id'],
-            debug=debug
-        )
+        local_result = local_future.result()
         result['local'] = local_result
         
         # The overall operation succeeds even if local sync fails
-        result['success'] = dropbox_result['success']
+        result['success'] = dropbox_result.success
         if not local_result['success']:
             result['error'] = f"Saved to Dropbox but failed to sync locally: {local_result.get('error', 'Unknown error')}"
     else:
         # If not syncing to local, we're done with success
-        result['success'] = dropbox_result['success']
+        result['success'] = dropbox_result.success
     
     return result
@@ -12,17 +12,29 @@ Features:
 """
 
 import os
+import re
 import json
 import datetime
 import time
 import logging
+import hashlib
+import hmac
 import shutil
+import threading
+import atexit
+import functools
+import mmap
+import random
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 import requests
 import dropbox
-from dropbox.exceptions import ApiError, AuthError
-from dropbox.files import WriteMode
+from dropbox.exceptions import ApiError, AuthError, RateLimitError
+from dropbox.files import CommitInfo, UploadSessionCursor, UploadSessionFinishArg, UploadSessionType, WriteMode
 from dotenv import load_dotenv
+from file_utils import write_file_atomic
 
 # Configure logging
 logging.basicConfig(
@@ -38,18 +50,302 @@ logger = logging.getLogger("dropbox_sync")
 # Load environment variables from .env file if present
 load_dotenv()
 
-# Dropbox API credentials
+# Dropbox API credentials, read once at import. Only the access token and its
+# expiry change afterwards, and only while client_lock is held.
 DROPBOX_APP_KEY = os.getenv("DROPBOX_APP_KEY", "2bi422xpd3xd962")
 DROPBOX_APP_SECRET = os.getenv("DROPBOX_APP_SECRET", "j3yx0b41qdvfu86")
 DROPBOX_ACCESS_TOKEN = os.getenv("DROPBOX_ACCESS_TOKEN", "")
 DROPBOX_REFRESH_TOKEN = os.getenv("DROPBOX_REFRESH_TOKEN", "RvyL03RE5qAAAAAAAAAAAVMVebvE7jDx8Okd0ploMzr85c6txvCRXpJAt30mxrKF")
 
+# Expiry (epoch seconds) of DROPBOX_ACCESS_TOKEN, if known from a refresh
+DROPBOX_ACCESS_TOKEN_EXPIRES_AT = None
+
+# Refresh a cached client this long before its token expires
+TOKEN_EXPIRY_MARGIN = 300  # seconds
+# How long to reuse a client whose token expiry is unknown (e.g. from .env)
+UNKNOWN_EXPIRY_CLIENT_TTL = 300  # seconds
+# (connect, read) timeouts for the OAuth token endpoint
+TOKEN_REFRESH_TIMEOUT = (5, 15)  # seconds
+
+# HTTP connection pool shared by all Dropbox clients and token refreshes so
+# TLS connections are kept alive
+dropbox_http_session = dropbox.create_session(max_connections=32)
+
+# Client reused across calls until shortly before its token expires
+cached_client = None
+cached_client_expires_at = 0
+client_lock = threading.Lock()
+
+class RateLimiter:
+    """
+    Token bucket limiting how fast Dropbox API calls are made.
+    
+    Shared by all threads in the process so that concurrent requests together
+    stay below Dropbox's per-token rate limit, instead of running into 429
+    errors and Retry-After pauses.
+    """
+    
+    def __init__(self, rate, burst):
+        """
+        Args:
+            rate (float): Calls allowed per second on average (0 disables limiting)
+            burst (int): Maximum calls allowed in a quick burst
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a call is allowed"""
+        if self.rate <= 0:
+            return
+        
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+# Process-wide pacing of Dropbox API calls (calls per second, 0 to disable)
+DROPBOX_RATE_LIMIT = float(os.getenv("DROPBOX_RATE_LIMIT", "12"))
+DROPBOX_RATE_LIMIT_BURST = int(os.getenv("DROPBOX_RATE_LIMIT_BURST", "12"))
+dropbox_rate_limiter = RateLimiter(DROPBOX_RATE_LIMIT, DROPBOX_RATE_LIMIT_BURST)
+
+# Retries for Dropbox calls that fail with a dropped connection or timeout.
+# The SDK itself already retries 429 (rate limit) and 5xx responses.
+DROPBOX_MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1  # seconds
+RETRY_MAX_DELAY = 30  # seconds
+# ChunkedEncodingError is a connection dropped part way through a streamed body
+CONNECTION_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+def get_retry_delay(error, attempt):
+    """
+    Work out how long to wait before retrying a failed Dropbox call.
+    
+    Rate-limit errors honour the Retry-After value sent by Dropbox; other
+    errors use capped exponential backoff. Both add random jitter so that
+    concurrent workers don't retry in lockstep.
+    
+    Args:
+        error (Exception): The error raised by the failed attempt
+        attempt (int): The number of the upcoming retry (1 for the first retry)
+        
+    Returns:
+        float: Seconds to wait
+    """
+    if isinstance(error, RateLimitError) and error.backoff:
+        return error.backoff + random.uniform(0, 0.5)
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) + random.random()
+
+# Set on shutdown so threads sleeping between retries wake up immediately
+# instead of holding up the exit. Under Gunicorn the worker hooks in
+# gunicorn.conf.py set it as soon as the worker is told to stop; atexit is only
+# a last resort, since it runs after non-daemon threads have been joined.
+shutdown_event = threading.Event()
+atexit.register(shutdown_event.set)
+
+def wait_before_retry(wait_time):
+    """
+    Sleep before retrying a Dropbox call.
+    
+    Returns:
+        bool: True if the wait completed, False if it was cut short by shutdown
+              (the caller should stop retrying)
+    """
+    return not shutdown_event.wait(wait_time)
+
+def is_write_contention_error(error):
+    """
+    Check whether an upload failed only because too many writes were made to
+    the Dropbox namespace at once. Dropbox reports this as an API error rather
+    than a rate limit, so neither the SDK nor call_dropbox retries it.
+    
+    Args:
+        error (Exception): The error raised by the upload
+        
+    Returns:
+        bool: True if retrying the upload later may succeed
+    """
+    if not isinstance(error, ApiError):
+        return False
+    try:
+        return error.error.is_path() and error.error.get_path().reason.is_too_many_write_operations()
+    except AttributeError:
+        return False
+
+def call_dropbox(fn, *args, **kwargs):
+    """
+    Call a Dropbox SDK method at the shared rate limit, retrying dropped
+    connections and timeouts with jittered exponential backoff.
+    
+    Rate limits and server errors are already retried by the SDK itself, and
+    other API errors (such as a missing path) are raised straight away since
+    retrying can't fix them. A rejected token drops the cached client so the
+    next one refreshes it.
+    
+    Args:
+        fn (callable): The client method to call
+        
+    Returns:
+        The return value of fn
+    """
+    attempt = 0
+    while True:
+        dropbox_rate_limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except AuthError:
+            reset_dropbox_client()
+            raise
+        except CONNECTION_ERRORS as e:
+            attempt += 1
+            if attempt > DROPBOX_MAX_RETRIES:
+                raise
+            wait_time = get_retry_delay(e, attempt)
+            logger.warning(f"Dropbox call failed ({str(e)}), retry {attempt} of {DROPBOX_MAX_RETRIES} in {wait_time:.1f}s")
+            if not wait_before_retry(wait_time):
+                raise
+
+# Number of files transferred in parallel by full backups and restores
+DROPBOX_SYNC_WORKERS = int(os.getenv("DROPBOX_SYNC_WORKERS", "8"))
+
+# Chunk size for upload sessions of large files, in MiB. Fewer, larger chunks
+# mean fewer round trips, but very large chunks risk request timeouts on slow
+# links, so the size is capped at 32 MiB (Dropbox itself allows up to 150 MiB).
+MAX_UPLOAD_CHUNK_SIZE_MB = 32
+UPLOAD_CHUNK_SIZE = min(max(int(os.getenv("DROPBOX_CHUNK_SIZE_MB", "16")), 1), MAX_UPLOAD_CHUNK_SIZE_MB) * 1024 * 1024
+
+# Chunks of a concurrent upload session must be a multiple of 4 MiB
+CONCURRENT_UPLOAD_CHUNK_SIZE = max(UPLOAD_CHUNK_SIZE // (4 * 1024 * 1024), 1) * 4 * 1024 * 1024
+# Largest file the Dropbox API accepts through an upload session
+DROPBOX_MAX_UPLOAD_SIZE = 350 * 1024 * 1024 * 1024
+# Number of chunks of one large file sent in parallel
+CONCURRENT_UPLOAD_WORKERS = 4
+
+# Files up to this size are uploaded in a single request and committed
+# together with files_upload_session_finish_batch_v2
+BATCH_UPLOAD_MAX_SIZE = UPLOAD_CHUNK_SIZE
+# Dropbox accepts at most this many entries per batch commit
+BATCH_UPLOAD_MAX_ENTRIES = 1000
+
+# Buffer size for streaming restored files to disk
+RESTORE_BUFFER_SIZE = 1024 * 1024
+
+# Zip downloads of a sender folder are kept in memory up to this size, then spooled to disk
+ZIP_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+# Shared pool for the parallel chunks of large uploads
+chunk_upload_executor = ThreadPoolExecutor(
+    max_workers=CONCURRENT_UPLOAD_WORKERS,
+    thread_name_prefix="dropbox-chunk-upload"
+)
+
+# Polling of background folder batch jobs
+FOLDER_BATCH_POLL_INTERVAL = 1  # seconds
+FOLDER_BATCH_MAX_POLLS = 30
+
 # Dropbox folder name for backups
 DROPBOX_BACKUP_FOLDER = "/WebhookBackup"
 
+# Dropbox folder paths already seen to exist, so they aren't checked again on
+# every backup. Cleared by reset_dropbox_client.
+known_dropbox_folders = set()
+
 # Local data directory
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 
+# The app's .env file, which a refreshed access token is written back to
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+# Block size used by Dropbox's content_hash algorithm
+DROPBOX_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+class DropboxContentHasher:
+    """
+    Incremental Dropbox content hash, fed with data as it is read or written.
+    
+    This is the value Dropbox reports as FileMetadata.content_hash: the
+    SHA-256 of each 4 MiB block, concatenated and hashed again with SHA-256.
+    Data can be passed to update() in chunks of any size, so a file can be
+    hashed in a single streaming pass without holding it in memory.
+    """
+    
+    def __init__(self):
+        self.overall_hasher = hashlib.sha256()
+        self.block_hasher = hashlib.sha256()
+        self.block_pos = 0
+    
+    def update(self, data):
+        """Add more data (bytes or any buffer) to the hash"""
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            if self.block_pos == DROPBOX_HASH_BLOCK_SIZE:
+                self.overall_hasher.update(self.block_hasher.digest())
+                self.block_hasher = hashlib.sha256()
+                self.block_pos = 0
+            
+            part = view[offset:offset + DROPBOX_HASH_BLOCK_SIZE - self.block_pos]
+            self.block_hasher.update(part)
+            self.block_pos += len(part)
+            offset += len(part)
+    
+    def hexdigest(self):
+        """Return the hex-encoded content hash of all data seen so far"""
+        overall_hasher = self.overall_hasher.copy()
+        if self.block_pos > 0:
+            overall_hasher.update(self.block_hasher.digest())
+        return overall_hasher.hexdigest()
+
+def dropbox_content_hash(file_content):
+    """
+    Compute the Dropbox content hash of some bytes.
+    Comparing it to the metadata of an uploaded file verifies the upload
+    without downloading it again.
+    
+    Args:
+        file_content (bytes): The file content
+        
+    Returns:
+        str: Hex-encoded content hash
+    """
+    hasher = DropboxContentHasher()
+    hasher.update(file_content)
+    return hasher.hexdigest()
+
+def dropbox_file_content_hash(local_path):
+    """
+    Compute the Dropbox content hash of a local file, reading it block by block.
+    
+    Args:
+        local_path (str): Path of the local file
+        
+    Returns:
+        str: The hex-encoded content hash
+    """
+    hasher = DropboxContentHasher()
+    with open(local_path, 'rb') as f:
+        for block in iter(functools.partial(f.read, DROPBOX_HASH_BLOCK_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+# Matches the access token line of the .env file
+ENV_ACCESS_TOKEN_PATTERN = re.compile(r'^DROPBOX_ACCESS_TOKEN=.*$', re.MULTILINE)
+
 def refresh_access_token(debug=False):
     """
     Refresh the Dropbox access token using the refresh token.
@@ -58,6 +354,8 @@ def refresh_access_token(debug=False):
     Args:
         debug (bool): If True, prints additional debug information
     """
+    global DROPBOX_ACCESS_TOKEN_EXPIRES_AT
+    
     logger.info("Refreshing Dropbox access token...")
     
     if debug:
@@ -79,7 +377,7 @@ def refresh_access_token(debug=False):
         
         # Make the request with detailed logging
         logger.info(f"Making token refresh request to {url}")
-        response = requests.post(url, data=data)
+        response = dropbox_http_session.post(url, data=data, timeout=TOKEN_REFRESH_TIMEOUT)
         
         # Log the response details
         if debug or response.status_code != 200:
@@ -97,27 +395,29 @@ def refresh_access_token(debug=False):
         if new_token:
             logger.info(f"Successfully refreshed access token. Expires in {expires_in} seconds.")
             
+            if isinstance(expires_in, int):
+                DROPBOX_ACCESS_TOKEN_EXPIRES_AT = time.time() + expires_in
+            else:
+                DROPBOX_ACCESS_TOKEN_EXPIRES_AT = None
+            
             # Update the access token in .env file if possible
             try:
-                if os.path.exists('.env'):
-                    with open('.env', 'r') as f:
+                if os.path.exists(ENV_FILE):
+                    with open(ENV_FILE, 'r') as f:
                         env_content = f.read()
                     
-                    # Check if DROPBOX_ACCESS_TOKEN exists in .env
-                    if 'DROPBOX_ACCESS_TOKEN=' in env_content:
-                        # Replace existing token
-                        import re
-                        new_env = re.sub(
-                            r'DROPBOX_ACCESS_TOKEN=.*',
-                            f'DROPBOX_ACCESS_TOKEN={new_token}',
-                            env_content
-                        )
-                    else:
-                        # Add token if not exists
+                    # Replace the existing token line, or add one if there is none
+                    new_env, replaced = ENV_ACCESS_TOKEN_PATTERN.subn(
+                        lambda match: f'DROPBOX_ACCESS_TOKEN={new_token}',
+                        env_content,
+                        count=1
+                    )
+                    if not replaced:
                         new_env = env_content + f'\nDROPBOX_ACCESS_TOKEN={new_token}\n'
                     
-                    with open('.env', 'w') as f:
-                        f.write(new_env)
+                    # Written atomically, so a crash mid-write can't leave a
+                    # truncated .env behind
+                    write_file_atomic(ENV_FILE, new_env.encode('utf-8'))
                     
                     logger.info("Updated access token in .env file")
             except Exception as e:
@@ -141,8 +441,61 @@ def refresh_access_token(debug=False):
 def get_dropbox_client(debug=False):
     """
     Get a Dropbox client instance with a valid access token.
+    
+    The client (and its HTTP connection pool) is cached and reused until
+    shortly before its access token expires, so most calls don't need any
+    network round trip. A new client is connected when the cache runs out.
+    
+    Args:
+        debug (bool): If True, enables verbose debug logging
+        
+    Returns:
+        dropbox.Dropbox: A configured Dropbox client
+        
+    Raises:
+        AuthError: If a valid access token cannot be obtained
+        ConnectionError: If connection to Dropbox API fails
+    """
+    global cached_client, cached_client_expires_at
+    
+    with client_lock:
+        if cached_client is not None and time.time() < cached_client_expires_at:
+            if debug:
+                logger.info("Reusing cached Dropbox client")
+            return cached_client
+        
+        dbx = connect_dropbox_client(debug=debug)
+        
+        if DROPBOX_ACCESS_TOKEN_EXPIRES_AT:
+            cached_client_expires_at = DROPBOX_ACCESS_TOKEN_EXPIRES_AT - TOKEN_EXPIRY_MARGIN
+        else:
+            cached_client_expires_at = time.time() + UNKNOWN_EXPIRY_CLIENT_TTL
+        cached_client = dbx
+        
+        return dbx
+
+def reset_dropbox_client():
+    """
+    Drop the cached client and token after Dropbox rejects the token, so the
+    next get_dropbox_client call refreshes it instead of reusing it.
+    """
+    global cached_client, cached_client_expires_at, DROPBOX_ACCESS_TOKEN, DROPBOX_ACCESS_TOKEN_EXPIRES_AT
+    
+    with client_lock:
+        cached_client = None
+        cached_client_expires_at = 0
+        DROPBOX_ACCESS_TOKEN = ""
+        DROPBOX_ACCESS_TOKEN_EXPIRES_AT = None
+        known_dropbox_folders.clear()
+
+def connect_dropbox_client(debug=False):
+    """
+    Create a new Dropbox client with a valid access token.
     First tries the current access token, then refreshes if needed.
     
+    Updates the shared access token, so callers must hold client_lock
+    (get_dropbox_client does this).
+    
     Args:
         debug (bool): If True, enables verbose debug logging
         
@@ -158,8 +511,18 @@ def get_dropbox_client(debug=False):
     if debug:
         logger.info(f"Getting Dropbox client. Current token status: {'Set' if DROPBOX_ACCESS_TOKEN else 'Not set'}")
     
+    # A token inside its expiry margin is refreshed straight away rather than
+    # probed: it still works, but a client cached with it would already be due
+    # for renewal, so every call until it expires would connect again
+    token_expiring = (
+        DROPBOX_ACCESS_TOKEN_EXPIRES_AT is not None and
+        time.time() >= DROPBOX_ACCESS_TOKEN_EXPIRES_AT - TOKEN_EXPIRY_MARGIN
+    )
+    if token_expiring:
+        logger.info("Access token is about to expire, refreshing it")
+    
     # First try with existing token if available
-    if DROPBOX_ACCESS_TOKEN:
+    if DROPBOX_ACCESS_TOKEN and not token_expiring:
         try:
             if debug:
                 logger.info("Attempting to use existing access token")
@@ -169,7 +532,8 @@ def get_dropbox_client(debug=False):
                 DROPBOX_ACCESS_TOKEN,
                 app_key=DROPBOX_APP_KEY,
                 app_secret=DROPBOX_APP_SECRET,
-                timeout=30
+                timeout=30,
+                session=dropbox_http_session
             )
             
             # Test if the token is valid
@@ -216,9 +580,17 @@ def get_dropbox_client(debug=False):
                 DROPBOX_ACCESS_TOKEN,
                 app_key=DROPBOX_APP_KEY,
                 app_secret=DROPBOX_APP_SECRET,
-                timeout=30
+                timeout=30,
+                session=dropbox_http_session
             )
             
+            # A token we just received with a known lifetime is good until it
+            # expires, so only probe it when the lifetime is unknown
+            if DROPBOX_ACCESS_TOKEN_EXPIRES_AT:
+                if debug:
+                    logger.info("New token valid until expiry, skipping verification call")
+                return dbx
+            
             # Verify the new token works
             try:
                 account_info = dbx.users_get_current_account()
@@ -240,7 +612,25 @@ def get_dropbox_client(debug=False):
         logger.error(f"Unexpected error getting Dropbox client: {str(e)}")
         raise
 
-def ensure_dropbox_folders(dbx, debug=False):
+def list_sender_folders(dbx):
+    """
+    Get the names of all sender folders in the Dropbox backup folder with a
+    single listing, instead of checking each sender separately.
+    
+    Args:
+        dbx: Dropbox client instance
+        
+    Returns:
+        set: Names of the existing sender folders (empty if the backup folder doesn't exist)
+    """
+    folders = {
+        entry.name for entry in list_files_in_dropbox_folder(dbx, DROPBOX_BACKUP_FOLDER)
+        if isinstance(entry, dropbox.files.FolderMetadata)
+    }
+    known_dropbox_folders.update(f"{DROPBOX_BACKUP_FOLDER}/{name}" for name in folders)
+    return folders
+
+def ensure_dropbox_folders(dbx, debug=False, existing_folders=None):
     """
     Ensure all necessary folders exist in Dropbox.
     Creates the main backup folder and mirrors the local folder structure.
@@ -248,6 +638,9 @@ def ensure_dropbox_folders(dbx, debug=False):
     Args:
         dbx: Dropbox client instance
         debug (bool): If True, enables verbose debug logging
+        existing_folders (set, optional): Sender folders known to exist, as
+            returned by list_sender_folders. Listed here if not given, and
+            updated with any folders that get created.
         
     Returns:
         bool: True if all folders were ensured, False if there was an error
@@ -267,7 +660,7 @@ def ensure_dropbox_folders(dbx, debug=False):
             logger.info("Verifying Dropbox connection")
         
         try:
-            account_info = dbx.users_get_current_account()
+            account_info = call_dropbox(dbx.users_get_current_account)
             if debug:
                 logger.info(f"Connected to Dropbox as: {account_info.name.display_name}")
         except Exception as e:
@@ -281,7 +674,9 @@ def ensure_dropbox_folders(dbx, debug=False):
             logger.info(f"Checking if main folder exists: {DROPBOX_BACKUP_FOLDER}")
             
         try:
-            dbx.files_get_metadata(DROPBOX_BACKUP_FOLDER)
+            if DROPBOX_BACKUP_FOLDER not in known_dropbox_folders:
+                call_dropbox(dbx.files_get_metadata, DROPBOX_BACKUP_FOLDER)
+                known_dropbox_folders.add(DROPBOX_BACKUP_FOLDER)
             if debug:
                 logger.info(f"Main folder already exists: {DROPBOX_BACKUP_FOLDER}")
             result["main_folder_exists"] = True
@@ -292,9 +687,10 @@ def ensure_dropbox_folders(dbx, debug=False):
             # Check if the error is actually "not found"
             if isinstance(e.error, dropbox.files.GetMetadataError) and e.error.is_path() and e.error.get_path().is_not_found():
                 try:
-                    folder_metadata = dbx.files_create_folder_v2(DROPBOX_BACKUP_FOLDER)
+                    folder_metadata = call_dropbox(dbx.files_create_folder_v2, DROPBOX_BACKUP_FOLDER)
                     logger.info(f"Created main backup folder: {folder_metadata.metadata.path_display}")
                     result["main_folder_created"] = True
+                    known_dropbox_folders.add(DROPBOX_BACKUP_FOLDER)
                 except Exception as create_err:
                     error_msg = f"Failed to create main folder: {str(create_err)}"
                     logger.error(error_msg)
@@ -309,44 +705,86 @@ def ensure_dropbox_folders(dbx, debug=False):
                 
         # Create sender folders if they don't exist
         if os.path.exists(DATA_DIR):
-            senders = [d for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))]
+            with os.scandir(DATA_DIR) as entries:
+                senders = [entry.name for entry in entries if entry.is_dir()]
             
             if debug:
                 logger.info(f"Found {len(senders)} sender directories to check")
             
-            for sender in senders:
-                sender_path = os.path.join(DATA_DIR, sender)
-                if os.path.isdir(sender_path):
-                    result["sender_folders_checked"] += 1
-                    dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender}"
-                    
+            # Only senders not already known to exist need checking, and
+            # those are found with one listing
+            unknown_senders = [
+                sender for sender in senders
+                if f"{DROPBOX_BACKUP_FOLDER}/{sender}" not in known_dropbox_folders
+            ]
+            result["sender_folders_checked"] = len(senders)
+            if unknown_senders and existing_folders is None:
+                existing_folders = list_sender_folders(dbx) if result["main_folder_exists"] else set()
+            
+            missing_senders = []
+            for sender in unknown_senders:
+                dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender}"
+                
+                if sender in existing_folders:
+                    if debug:
+                        logger.info(f"Sender folder exists: {dropbox_sender_path}")
+                    known_dropbox_folders.add(dropbox_sender_path)
+                    continue
+                
+                missing_senders.append(sender)
+            
+            # Create all missing sender folders with a single batch call,
+            # falling back to one call per folder for any the batch didn't create
+            if missing_senders:
+                failed_senders = missing_senders
+                
+                try:
                     if debug:
-                        logger.info(f"Checking sender folder: {dropbox_sender_path}")
+                        logger.info(f"Creating {len(missing_senders)} sender folders in one batch")
+                    launch = call_dropbox(
+                        dbx.files_create_folder_batch,
+                        [f"{DROPBOX_BACKUP_FOLDER}/{sender}" for sender in missing_senders],
+                        force_async=False
+                    )
+                    
+                    # Large batches may still be run as a background job
+                    if launch.is_async_job_id():
+                        job_id = launch.get_async_job_id()
+                        for _ in range(FOLDER_BATCH_MAX_POLLS):
+                            time.sleep(FOLDER_BATCH_POLL_INTERVAL)
+                            launch = call_dropbox(dbx.files_create_folder_batch_check, job_id)
+                            if not launch.is_in_progress():
+                                break
                     
+                    if launch.is_complete():
+                        failed_senders = []
+                        for sender, entry in zip(missing_senders, launch.get_complete().entries):
+                            if entry.is_success():
+                                logger.info(f"Created sender folder: {entry.get_success().metadata.path_display}")
+                                result["sender_folders_created"] += 1
+                                existing_folders.add(sender)
+                                known_dropbox_folders.add(f"{DROPBOX_BACKUP_FOLDER}/{sender}")
+                            else:
+                                logger.warning(f"Batch creation of sender folder {sender} failed: {entry.get_failure()}")
+                                failed_senders.append(sender)
+                except Exception as batch_err:
+                    logger.warning(f"Batch folder creation failed, creating folders one by one: {str(batch_err)}")
+                
+                for sender in failed_senders:
+                    dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender}"
                     try:
-                        # Check if folder exists
-                        dbx.files_get_metadata(dropbox_sender_path)
                         if debug:
-                            logger.info(f"Sender folder exists: {dropbox_sender_path}")
-                    except ApiError as e:
-                        # Only create if the error is "not found"
-                        if isinstance(e.error, dropbox.files.GetMetadataError) and e.error.is_path() and e.error.get_path().is_not_found():
-                            try:
-                                if debug:
-                                    logger.info(f"Creating sender folder: {dropbox_sender_path}")
-                                folder_metadata = dbx.files_create_folder_v2(dropbox_sender_path)
-                                logger.info(f"Created sender folder: {folder_metadata.metadata.path_display}")
-                                result["sender_folders_created"] += 1
-                            except Exception as create_err:
-                                error_msg = f"Failed to create sender folder {sender}: {str(create_err)}"
-                                logger.error(error_msg)
-                                result["errors"].append(error_msg)
-                                # Continue with other folders instead of failing completely
-                        else:
-                            # If it's another API error, log it but continue
-                            error_msg = f"API error checking sender folder {sender}: {str(e)}"
-                            logger.error(error_msg)
-                            result["errors"].append(error_msg)
+                            logger.info(f"Creating sender folder: {dropbox_sender_path}")
+                        folder_metadata = call_dropbox(dbx.files_create_folder_v2, dropbox_sender_path)
+                        logger.info(f"Created sender folder: {folder_metadata.metadata.path_display}")
+                        result["sender_folders_created"] += 1
+                        existing_folders.add(sender)
+                        known_dropbox_folders.add(dropbox_sender_path)
+                    except Exception as create_err:
+                        error_msg = f"Failed to create sender folder {sender}: {str(create_err)}"
+                        logger.error(error_msg)
+                        result["errors"].append(error_msg)
+                        # Continue with other folders instead of failing completely
         else:
             if debug:
                 logger.info(f"Local data directory does not exist yet: {DATA_DIR}")
@@ -369,8 +807,9 @@ def ensure_dropbox_folders(dbx, debug=False):
 def create_dropbox_path(dbx, path, debug=False):
     """
     Create a folder path in Dropbox, creating parent folders as needed.
-    This is a helper function to ensure that a path exists, creating each folder
-    in the path if necessary.
+    This is a helper function to ensure that a path exists. Dropbox creates
+    any missing parent folders itself, so the whole path takes one call, and
+    none at all once it is known to exist.
     
     Args:
         dbx: Dropbox client instance
@@ -383,10 +822,6 @@ def create_dropbox_path(dbx, path, debug=False):
     if debug:
         logger.info(f"Creating Dropbox path: {path}")
     
-    # If it's just the root folder, there's nothing to do
-    if path == "" or path == "/":
-        return True
-    
     # Split the path into components
     # Remove leading/trailing slashes and split by /
     components = [p for p in path.strip('/').split('/') if p]
@@ -394,42 +829,31 @@ def create_dropbox_path(dbx, path, debug=False):
     if not components:
         return True  # Nothing to create
     
-    # Start with the root
-    current_path = ""
+    folder_path = "/" + "/".join(components)
+    if folder_path in known_dropbox_folders:
+        return True
     
-    # Create each component of the path
-    for i, component in enumerate(components):
-        # Build the path incrementally
-        if current_path:
-            current_path = f"{current_path}/{component}"
-        else:
-            current_path = f"/{component}"
-            
+    try:
+        metadata = call_dropbox(dbx.files_create_folder_v2, folder_path)
         if debug:
-            logger.info(f"Checking component: {current_path}")
-        
-        try:
-            # Check if this component exists
-            dbx.files_get_metadata(current_path)
+            logger.info(f"Created folder: {metadata.metadata.path_display}")
+    except ApiError as e:
+        # A folder that already exists is as good as a created one
+        if (isinstance(e.error, dropbox.files.CreateFolderError) and e.error.is_path() and
+                e.error.get_path().is_conflict() and e.error.get_path().get_conflict().is_folder()):
             if debug:
-                logger.info(f"Path component exists: {current_path}")
-                
-        except ApiError as e:
-            # Create the folder if it doesn't exist
-            if isinstance(e.error, dropbox.files.GetMetadataError) and e.error.is_path() and e.error.get_path().is_not_found():
-                try:
-                    if debug:
-                        logger.info(f"Creating path component: {current_path}")
-                    metadata = dbx.files_create_folder_v2(current_path)
-                    if debug:
-                        logger.info(f"Created folder: {metadata.metadata.path_display}")
-                except Exception as create_err:
-                    logger.error(f"Failed to create folder {current_path}: {str(create_err)}")
-                    return False
-            else:
-                logger.error(f"API error checking path {current_path}: {str(e)}")
-                return False
-                
+                logger.info(f"Path already exists: {folder_path}")
+        else:
+            logger.error(f"Failed to create folder {folder_path}: {str(e)}")
+            return False
+    except Exception as e:
+        logger.error(f"Failed to create folder {folder_path}: {str(e)}")
+        return False
+    
+    # The folder and all its parents exist now
+    for i in range(1, len(components) + 1):
+        known_dropbox_folders.add("/" + "/".join(components[:i]))
+    
     return True
 
 def list_dropbox_files(dbx, path, debug=False, recursive=False):
@@ -459,44 +883,124 @@ def list_dropbox_files(dbx, path, debug=False, recursive=False):
         logger.error(f"Error in enhanced list_dropbox_files for {path}: {str(e)}")
         raise
 
-def backup_file(dbx, local_path, dropbox_path):
+def upload_to_concurrent_session(dbx, content):
+    """
+    Send data to a new concurrent upload session, its chunks in parallel over
+    several connections. The last chunk is only sent once all the others have
+    been stored, since it closes the session.
+    
+    Args:
+        dbx: Dropbox client instance
+        content (bytes or mmap.mmap): The data to upload
+        
+    Returns:
+        str: The upload session ID, ready to be committed at offset len(content)
+    """
+    size = len(content)
+    
+    # Concurrent sessions must be started empty
+    session_id = call_dropbox(
+        dbx.files_upload_session_start, b'', session_type=UploadSessionType.concurrent
+    ).session_id
+    
+    def append_chunk(offset, close=False):
+        end = min(offset + CONCURRENT_UPLOAD_CHUNK_SIZE, size)
+        call_dropbox(
+            dbx.files_upload_session_append_v2,
+            content[offset:end],
+            UploadSessionCursor(session_id=session_id, offset=offset),
+            close=close
+        )
+    
+    offsets = list(range(0, size, CONCURRENT_UPLOAD_CHUNK_SIZE))
+    last_offset = offsets.pop()
+    
+    futures = [chunk_upload_executor.submit(append_chunk, offset) for offset in offsets]
+    # Let every chunk finish (the content may be a mapping the caller closes
+    # afterwards), then raise the first failure, if any
+    wait(futures)
+    for future in futures:
+        future.result()
+    
+    append_chunk(last_offset, close=True)
+    
+    return session_id
+
+def start_upload_session(dbx, file_content):
+    """
+    Send file content to a new, closed upload session without committing it.
+    Content larger than UPLOAD_CHUNK_SIZE goes through a concurrent session,
+    anything smaller in a single request.
+    
+    Args:
+        dbx: Dropbox client instance
+        file_content (bytes): The file content to upload
+        
+    Returns:
+        str: The upload session ID, ready to be committed at offset len(file_content)
+    """
+    if len(file_content) > UPLOAD_CHUNK_SIZE:
+        return upload_to_concurrent_session(dbx, file_content)
+    return call_dropbox(dbx.files_upload_session_start, file_content, close=True).session_id
+
+def upload_file_concurrently(dbx, f, file_size, dropbox_path):
+    """
+    Upload a large file through a concurrent upload session, sending its
+    chunks in parallel instead of one round trip after another.
+    
+    Args:
+        dbx: Dropbox client instance
+        f: The file, opened for binary reading
+        file_size (int): Size of the file
+        dropbox_path (str): Destination path in Dropbox
+        
+    Returns:
+        dropbox.files.FileMetadata: Metadata of the committed file
+    """
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if len(mapped) != file_size:
+            raise IOError(f"File changed size during upload: {dropbox_path}")
+        session_id = upload_to_concurrent_session(dbx, mapped)
+    
+    cursor = UploadSessionCursor(session_id=session_id, offset=file_size)
+    commit = CommitInfo(path=dropbox_path, mode=WriteMode.overwrite)
+    return call_dropbox(dbx.files_upload_session_finish, b'', cursor, commit)
+
+def backup_file(dbx, local_path, dropbox_path, file_size=None, verify=False):
     """
     Upload a single file to Dropbox.
     Returns True if successful, False otherwise.
+    
+    Args:
+        dbx: Dropbox client instance
+        local_path (str): Path of the local file
+        dropbox_path (str): Destination path in Dropbox
+        file_size (int, optional): Size of the file if the caller already knows it
+        verify (bool): Check the uploaded file's content hash against the local file
     """
     logger.info(f"Backing up: {local_path} to {dropbox_path}")
     
     try:
         with open(local_path, 'rb') as f:
-            file_size = os.path.getsize(local_path)
+            if file_size is None:
+                file_size = os.fstat(f.fileno()).st_size
             
-            # For large files, use upload session
-            if file_size > 4 * 1024 * 1024:  # 4 MB
-                logger.info(f"Using upload session for large file: {local_path}")
-                upload_session_start_result = dbx.files_upload_session_start(f.read(4 * 1024 * 1024))
-                cursor = dropbox.files.UploadSessionCursor(
-                    session_id=upload_session_start_result.session_id,
-                    offset=f.tell()
-                )
-                commit = dropbox.files.CommitInfo(path=dropbox_path, mode=WriteMode.overwrite)
-                
-                while f.tell() < file_size:
-                    if (file_size - f.tell()) <= 4 * 1024 * 1024:  # Last chunk
-                        dbx.files_upload_session_finish(
-                            f.read(4 * 1024 * 1024),
-                            cursor,
-                            commit
-                        )
-                        break
-                    else:
-                        dbx.files_upload_session_append_v2(
-                            f.read(4 * 1024 * 1024),
-                            cursor
-                        )
-                        cursor.offset = f.tell()
+            # Fail before uploading anything if Dropbox would reject the file
+            if file_size > DROPBOX_MAX_UPLOAD_SIZE:
+                logger.error(f"File too large for Dropbox ({file_size} bytes): {local_path}")
+                return False
+            
+            # For large files, use a concurrent upload session
+            if file_size > UPLOAD_CHUNK_SIZE:
+                logger.info(f"Using concurrent upload session for large file: {local_path}")
+                metadata = upload_file_concurrently(dbx, f, file_size, dropbox_path)
             else:
                 # For small files, use simple upload
-                dbx.files_upload(f.read(), dropbox_path, mode=WriteMode.overwrite)
+                metadata = call_dropbox(dbx.files_upload, f.read(), dropbox_path, mode=WriteMode.overwrite)
+        
+        if verify and metadata.content_hash != dropbox_file_content_hash(local_path):
+            logger.error(f"Verification failed for {local_path}: Dropbox content hash does not match")
+            return False
         
         logger.info(f"Successfully backed up: {local_path}")
         return True
@@ -504,9 +1008,154 @@ def backup_file(dbx, local_path, dropbox_path):
         logger.error(f"Error backing up {local_path}: {str(e)}")
         return False
 
-def backup_all_data():
+def run_in_parallel(fn, dbx, tasks, workers):
+    """
+    Run fn(dbx, *task) for each task on a thread pool, keeping at most twice
+    as many tasks in flight as there are workers, so that large task lists
+    aren't all turned into pending futures up front.
+    
+    Args:
+        fn (callable): Function to run for each task
+        dbx: Dropbox client instance shared by all workers
+        tasks (iterable): Argument tuples for fn, after dbx
+        workers (int): Number of worker threads
+        
+    Yields:
+        tuple: (task, future) for each task, in order of completion
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+        for task in tasks:
+            if len(in_flight) >= 2 * workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future
+            in_flight[executor.submit(fn, dbx, *task)] = task
+        
+        for future in as_completed(in_flight):
+            yield in_flight[future], future
+
+def transfer_files(transfer, dbx, tasks, workers=None):
+    """
+    Run backup_file or restore_file for many files in parallel.
+    
+    Args:
+        transfer (callable): backup_file or restore_file
+        dbx: Dropbox client instance shared by all workers
+        tasks (list): (source path, destination path, ...) tuples; any extra
+            items are passed on as further arguments to transfer
+        workers (int, optional): Number of parallel transfers, defaults to DROPBOX_SYNC_WORKERS
+        
+    Returns:
+        int: Number of files transferred successfully
+    """
+    if not tasks:
+        return 0
+    
+    workers = max(1, min(workers or DROPBOX_SYNC_WORKERS, len(tasks)))
+    success_count = 0
+    
+    for _, future in run_in_parallel(transfer, dbx, tasks, workers):
+        if future.result():
+            success_count += 1
+    
+    return success_count
+
+def start_closed_upload_session(dbx, local_path):
+    """
+    Upload a whole file into a closed upload session without committing it.
+    
+    Args:
+        dbx: Dropbox client instance
+        local_path (str): Path of the local file
+        
+    Returns:
+        dropbox.files.UploadSessionCursor: Cursor pointing at the end of the uploaded data
+    """
+    with open(local_path, 'rb') as f:
+        file_content = f.read()
+    
+    session_id = start_upload_session(dbx, file_content)
+    return UploadSessionCursor(session_id=session_id, offset=len(file_content))
+
+def upload_files_batched(dbx, tasks, workers=None, verify=False):
+    """
+    Upload many small files and commit them with a single batch call.
+    
+    Each file's content is uploaded into its own closed session (in parallel),
+    then all sessions are committed together with files_upload_session_finish_batch_v2,
+    saving one commit round trip per file.
+    
+    Args:
+        dbx: Dropbox client instance shared by all workers
+        tasks (list): (local path, Dropbox path) tuples
+        workers (int, optional): Number of parallel uploads, defaults to DROPBOX_SYNC_WORKERS
+        verify (bool): Check each committed file's content hash against the local file
+        
+    Returns:
+        list: Local paths of the files committed (and verified) successfully
+    """
+    if not tasks:
+        return []
+    
+    workers = max(1, min(workers or DROPBOX_SYNC_WORKERS, len(tasks)))
+    entries = []
+    entry_local_paths = []
+    
+    def upload(dbx, local_path, dropbox_path):
+        return start_closed_upload_session(dbx, local_path)
+    
+    for (local_path, dropbox_path), future in run_in_parallel(upload, dbx, tasks, workers):
+        try:
+            cursor = future.result()
+        except Exception as e:
+            logger.error(f"Error backing up {local_path}: {str(e)}")
+            continue
+        
+        commit = CommitInfo(path=dropbox_path, mode=WriteMode.overwrite)
+        entries.append(UploadSessionFinishArg(cursor=cursor, commit=commit))
+        entry_local_paths.append(local_path)
+    
+    committed_paths = []
+    
+    for start in range(0, len(entries), BATCH_UPLOAD_MAX_ENTRIES):
+        batch = entries[start:start + BATCH_UPLOAD_MAX_ENTRIES]
+        logger.info(f"Committing batch of {len(batch)} files to Dropbox")
+        
+        try:
+            result = call_dropbox(dbx.files_upload_session_finish_batch_v2, batch)
+        except Exception as e:
+            logger.error(f"Error committing batch of {len(batch)} files: {str(e)}")
+            continue
+        
+        for entry, local_path, entry_result in zip(batch, entry_local_paths[start:], result.entries):
+            if entry_result.is_success():
+                if verify and entry_result.get_success().content_hash != dropbox_file_content_hash(local_path):
+                    logger.error(f"Verification failed for {local_path}: Dropbox content hash does not match")
+                    continue
+                committed_paths.append(local_path)
+            else:
+                logger.error(f"Error backing up {entry.commit.path}: {entry_result.get_failure()}")
+    
+    return committed_paths
+
+def backup_files_batched(dbx, tasks, workers=None, verify=False):
+    """
+    Upload many small files with upload_files_batched.
+    
+    Returns:
+        int: Number of files committed successfully
+    """
+    return len(upload_files_batched(dbx, tasks, workers, verify=verify))
+
+def backup_all_data(workers=None, verify=False):
     """
     Backup all webhook data to Dropbox.
+    
+    Args:
+        workers (int, optional): Number of parallel uploads, defaults to DROPBOX_SYNC_WORKERS
+        verify (bool): Check every uploaded file's content hash against the local file
+        
     Returns the number of files successfully backed up.
     """
     if not os.path.exists(DATA_DIR):
@@ -517,41 +1166,107 @@ def backup_all_data():
         # Get Dropbox client
         dbx = get_dropbox_client()
         
+        # Sender folders that already had backups before this run
+        existing_folders = list_sender_folders(dbx)
+        backed_up_senders = set(existing_folders)
+        
         # Ensure folder structure exists
-        if not ensure_dropbox_folders(dbx):
+        if not ensure_dropbox_folders(dbx, existing_folders=existing_folders):
             logger.error("Failed to create Dropbox folder structure")
             return 0
         
-        # Track successful backups
-        success_count = 0
+        # Files to upload, as (local path, Dropbox path) tuples. Small files
+        # are committed in batches, larger ones uploaded one by one.
+        small_tasks = []
+        large_tasks = []
+        unchanged_count = 0
         
-        # Process all sender directories
-        for sender in os.listdir(DATA_DIR):
-            sender_path = os.path.join(DATA_DIR, sender)
-            if os.path.isdir(sender_path):
-                # Create sender folder in Dropbox if needed
-                dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender}"
-                try:
-                    dbx.files_get_metadata(dropbox_sender_path)
-                except ApiError:
-                    dbx.files_create_folder_v2(dropbox_sender_path)
+        # Process all sender directories in one scandir pass per directory,
+        # reusing each entry's cached type and stat instead of separate calls
+        with os.scandir(DATA_DIR) as senders:
+            for sender_entry in senders:
+                if not sender_entry.is_dir():
+                    continue
+                
+                # The sender folder was created by ensure_dropbox_folders if needed
+                dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender_entry.name}"
+                
+                # Sizes and content hashes of the files already backed up
+                remote_files = {}
+                if sender_entry.name in backed_up_senders:
+                    remote_files = {
+                        entry.name: (entry.size, entry.content_hash)
+                        for entry in list_dropbox_files(dbx, dropbox_sender_path)
+                        if isinstance(entry, dropbox.files.FileMetadata)
+                    }
                 
                 # Process all JSON files in the sender directory
-                for filename in os.listdir(sender_path):
-                    if filename.endswith('.json'):
-                        local_file_path = os.path.join(sender_path, filename)
-                        dropbox_file_path = f"{dropbox_sender_path}/{filename}"
+                with os.scandir(sender_entry.path) as files:
+                    for file_entry in files:
+                        if not file_entry.name.endswith('.json'):
+                            continue
+                        
+                        dropbox_file_path = f"{dropbox_sender_path}/{file_entry.name}"
+                        file_size = file_entry.stat().st_size
+                        
+                        # Skip files whose backup already has the same content
+                        remote_file = remote_files.get(file_entry.name)
+                        if (remote_file and remote_file[0] == file_size and
+                                remote_file[1] == dropbox_file_content_hash(file_entry.path)):
+                            unchanged_count += 1
+                            continue
                         
-                        if backup_file(dbx, local_file_path, dropbox_file_path):
-                            success_count += 1
+                        if file_size <= BATCH_UPLOAD_MAX_SIZE:
+                            small_tasks.append((file_entry.path, dropbox_file_path))
+                        else:
+                            large_tasks.append((file_entry.path, dropbox_file_path, file_size))
+        
+        # Upload the files in parallel using the shared client
+        success_count = backup_files_batched(dbx, small_tasks, workers, verify=verify)
+        success_count += transfer_files(functools.partial(backup_file, verify=verify), dbx, large_tasks, workers)
         
-        logger.info(f"Backup complete. Successfully backed up {success_count} files.")
+        logger.info(f"Backup complete. Successfully backed up {success_count} files, {unchanged_count} unchanged.")
+        success_count += unchanged_count
         return success_count
     
     except Exception as e:
         logger.error(f"Error during backup: {str(e)}")
         return 0
 
+def record_dropbox_sync(local_file_path, dropbox_file_path, verified, retries=0, file_content=None):
+    """
+    Add a "_sync" entry to a submission file recording that it was backed up.
+    
+    Args:
+        local_file_path (str): Path of the local JSON file
+        dropbox_file_path (str): Path the file was backed up to
+        verified (bool): Whether the upload was verified
+        retries (int): Number of retries the upload needed
+        file_content (bytes, optional): The file's content if already read
+    """
+    if file_content is None:
+        with open(local_file_path, 'rb') as f:
+            file_content = f.read()
+    
+    # Parse with the standard library: the file is rewritten below, and orjson
+    # would turn integers beyond 64 bits into floats
+    file_data = json.loads(file_content)
+    
+    # Add sync metadata if it doesn't exist
+    if '_sync' not in file_data:
+        file_data['_sync'] = {}
+    
+    # Update sync info
+    file_data['_sync']['dropbox'] = {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'path': dropbox_file_path,
+        'verified': verified,
+        'retries': retries
+    }
+    
+    # Write back with sync info
+    write_file_atomic(local_file_path, json.dumps(file_data, indent=2).encode('utf-8'))
+
 def backup_specific_file(sender, submission_id, debug=False, max_retries=3, verify_upload=True):
     """
     Backup a specific webhook submission to Dropbox with retry and verification.
@@ -560,7 +1275,7 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
         sender (str): The sender's directory name
         submission_id (str): The submission ID (filename without .json)
         debug (bool): If True, enables verbose debug logging
-        max_retries (int): Maximum number of retry attempts for failed uploads
+        max_retries (int): Maximum number of retry attempts when Dropbox reports write contention
         verify_upload (bool): Whether to verify the uploaded file in Dropbox
     
     Returns:
@@ -586,9 +1301,13 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
     if debug:
         logger.info(f"Starting backup of submission {submission_id} from sender {sender}")
     
-    # Check for the local file
+    # Read the local file once; the same bytes are hashed, uploaded on every
+    # attempt and parsed again for the sync status update
     local_file_path = os.path.join(DATA_DIR, sender, f"{submission_id}.json")
-    if not os.path.exists(local_file_path):
+    try:
+        with open(local_file_path, 'rb') as f:
+            file_content = f.read()
+    except FileNotFoundError:
         error_msg = f"File not found: {local_file_path}"
         logger.warning(error_msg)
         result['error'] = error_msg
@@ -596,20 +1315,14 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
         return result
     
     result['details']['file_exists'] = True
-    result['details']['file_size'] = os.path.getsize(local_file_path)
+    result['details']['file_size'] = len(file_content)
     
-    # Calculate file hash for verification
+    # Calculate the Dropbox content hash for verification
     if verify_upload:
-        try:
-            import hashlib
-            with open(local_file_path, 'rb') as f:
-                file_hash = hashlib.md5(f.read()).hexdigest()
-                result['details']['local_file_hash'] = file_hash
-                if debug:
-                    logger.info(f"Local file hash: {file_hash}")
-        except Exception as e:
-            if debug:
-                logger.warning(f"Could not calculate file hash for verification: {str(e)}")
+        file_hash = dropbox_content_hash(file_content)
+        result['details']['local_file_hash'] = file_hash
+        if debug:
+            logger.info(f"Local file hash: {file_hash}")
     
     try:
         # Get Dropbox client with debug mode if requested
@@ -680,7 +1393,7 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
         # Check if the file already exists in Dropbox
         file_exists_in_dropbox = False
         try:
-            existing_file = dbx.files_get_metadata(dropbox_file_path)
+            existing_file = call_dropbox(dbx.files_get_metadata, dropbox_file_path)
             file_exists_in_dropbox = True
             if debug:
                 logger.info(f"File already exists in Dropbox: {dropbox_file_path}")
@@ -704,16 +1417,12 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
                 if debug:
                     logger.info(f"Uploading file to: {dropbox_file_path}")
                 
-                # Read the file content once and store in memory
-                with open(local_file_path, 'rb') as f:
-                    file_content = f.read()
-                    file_size = len(file_content)
-                
                 if debug:
-                    logger.info(f"Uploading {file_size} bytes")
+                    logger.info(f"Uploading {len(file_content)} bytes")
                 
                 # Upload the file
-                upload_result = dbx.files_upload(
+                upload_result = call_dropbox(
+                    dbx.files_upload,
                     file_content, 
                     dropbox_file_path, 
                     mode=WriteMode.overwrite
@@ -728,17 +1437,23 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
                 upload_error = str(e)
                 logger.warning(f"Upload attempt {retry_count} failed: {upload_error}")
                 
-                # Wait a bit before retrying (exponential backoff)
+                # call_dropbox and the SDK already retried dropped connections,
+                # rate limits and server errors; only write contention is
+                # worth another attempt
+                if not is_write_contention_error(e):
+                    break
+                
                 if retry_count <= max_retries:
-                    retry_delay = min(2 ** retry_count, 30)  # max 30 seconds
+                    retry_delay = get_retry_delay(e, retry_count)
                     if debug:
-                        logger.info(f"Waiting {retry_delay} seconds before retry...")
-                    time.sleep(retry_delay)
+                        logger.info(f"Waiting {retry_delay:.1f} seconds before retry...")
+                    if not wait_before_retry(retry_delay):
+                        break
         
         result['retries'] = retry_count
         
         if not upload_success:
-            error_msg = f"Failed to upload file after {max_retries} retries: {upload_error}"
+            error_msg = f"Failed to upload file after {retry_count} attempts: {upload_error}"
             logger.error(error_msg)
             result['error'] = error_msg
             result['details']['upload_error'] = upload_error
@@ -750,20 +1465,16 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
                 if debug:
                     logger.info(f"Verifying uploaded file: {dropbox_file_path}")
                 
-                # Get the metadata of the uploaded file
-                metadata = dbx.files_get_metadata(dropbox_file_path)
-                result['details']['dropbox_file_size'] = metadata.size
-                
-                # Download the file to verify content
-                _, response = dbx.files_download(dropbox_file_path)
-                dropbox_content = response.content
-                
-                # Calculate hash for the downloaded content
-                dropbox_hash = hashlib.md5(dropbox_content).hexdigest()
+                # The upload's metadata carries the size and content hash
+                # Dropbox computed over the stored file, so there's no need to
+                # fetch the metadata again or download the file
+                result['details']['dropbox_file_size'] = upload_result.size
+                dropbox_hash = upload_result.content_hash
                 result['details']['dropbox_file_hash'] = dropbox_hash
                 
                 # Compare file sizes and hashes
-                if len(dropbox_content) == result['details']['file_size'] and dropbox_hash == result['details']['local_file_hash']:
+                if (upload_result.size == result['details']['file_size'] and
+                        hmac.compare_digest(dropbox_hash, result['details']['local_file_hash'])):
                     result['verified'] = True
                     if debug:
                         logger.info("File verification successful - content matches")
@@ -771,7 +1482,7 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
                     result['verified'] = False
                     if debug:
                         logger.warning("File verification failed - content does not match")
-                        logger.warning(f"Local size: {result['details']['file_size']}, Dropbox size: {len(dropbox_content)}")
+                        logger.warning(f"Local size: {result['details']['file_size']}, Dropbox size: {upload_result.size}")
                         logger.warning(f"Local hash: {result['details']['local_file_hash']}, Dropbox hash: {dropbox_hash}")
             
             except Exception as e:
@@ -785,26 +1496,10 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
         
         # Add a sync status entry to the file to indicate it's been backed up
         try:
-            # Read the existing file
-            with open(local_file_path, 'r') as f:
-                file_data = json.load(f)
-            
-            # Add sync metadata if it doesn't exist
-            if '_sync' not in file_data:
-                file_data['_sync'] = {}
-            
-            # Update sync info
-            file_data['_sync']['dropbox'] = {
-                'timestamp': datetime.datetime.now().isoformat(),
-                'path': dropbox_file_path,
-                'verified': result['verified'],
-                'retries': retry_count
-            }
-            
-            # Write back with sync info
-            with open(local_file_path, 'w') as f:
-                json.dump(file_data, f, indent=2)
-                
+            record_dropbox_sync(
+                local_file_path, dropbox_file_path, result['verified'],
+                retries=retry_count, file_content=file_content
+            )
             if debug:
                 logger.info("Updated local file with sync status metadata")
                 
@@ -820,26 +1515,53 @@ def backup_specific_file(sender, submission_id, debug=False, max_retries=3, veri
         result['error'] = error_msg
         return result
 
-def restore_file(dbx, dropbox_path, local_path):
+def restore_file(dbx, dropbox_path, local_path, size=None, content_hash=None):
     """
     Download a single file from Dropbox.
+    The local directory must already exist.
     Returns True if successful, False otherwise.
+    
+    Args:
+        dbx: Dropbox client instance
+        dropbox_path (str): Path of the file in Dropbox
+        local_path (str): Destination path of the local file
+        size (int, optional): Size of the Dropbox file, from its listing
+        content_hash (str, optional): Content hash of the Dropbox file, from
+            its listing. With size, lets an identical local file be kept
+            without downloading it.
     """
+    # Skip the download if the local copy is already identical
+    if content_hash is not None:
+        try:
+            if (os.stat(local_path).st_size == size and
+                    dropbox_file_content_hash(local_path) == content_hash):
+                logger.info(f"Already up to date: {local_path}")
+                return True
+        except OSError:
+            pass
+    
     logger.info(f"Restoring: {dropbox_path} to {local_path}")
     
+    # Download to a temporary file and move it into place once complete, so
+    # readers never see a partially written file
+    temp_path = local_path + ".part"
+    
     try:
-        # Make sure the directory exists
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        
-        # Download the file
-        metadata, response = dbx.files_download(dropbox_path)
-        with open(local_path, 'wb') as f:
-            f.write(response.content)
+        # Download the file, streaming it to disk one buffer at a time
+        metadata, response = call_dropbox(dbx.files_download, dropbox_path)
+        with response, open(temp_path, 'wb') as f:
+            response.raw.decode_content = True
+            shutil.copyfileobj(response.raw, f, RESTORE_BUFFER_SIZE)
+        os.replace(temp_path, local_path)
         
         logger.info(f"Successfully restored: {dropbox_path}")
         return True
     except Exception as e:
         logger.error(f"Error restoring {dropbox_path}: {str(e)}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
         return False
 
 # Legacy function - renamed to avoid recursion
@@ -864,12 +1586,12 @@ def list_files_in_dropbox_folder(dbx, folder_path, recursive=False, debug=False)
         
         # Make the API request with pagination support
         try:
-            result = dbx.files_list_folder(folder_path, recursive=recursive)
+            result = call_dropbox(dbx.files_list_folder, folder_path, recursive=recursive)
             entries = result.entries
             
             # Continue fetching if there's more (pagination)
             while result.has_more:
-                result = dbx.files_list_folder_continue(result.cursor)
+                result = call_dropbox(dbx.files_list_folder_continue, result.cursor)
                 entries.extend(result.entries)
                 
                 if debug and len(result.entries) > 0:
@@ -934,44 +1656,52 @@ def list_dropbox_files(dbx, folder_path):
         logger.error("Returning empty list due to error")
         return []
 
-def restore_all_data():
+def restore_all_data(workers=None):
     """
     Restore all webhook data from Dropbox.
+    
+    Args:
+        workers (int, optional): Number of parallel downloads, defaults to DROPBOX_SYNC_WORKERS
+        
     Returns the number of files successfully restored.
     """
     try:
         # Get Dropbox client
         dbx = get_dropbox_client()
         
-        # Track successful restores
-        success_count = 0
+        # Files to download, as (Dropbox path, local path, size, content hash) tuples
+        tasks = []
         
-        # Check if backup folder exists in Dropbox
-        try:
-            dbx.files_get_metadata(DROPBOX_BACKUP_FOLDER)
-        except ApiError:
-            logger.error(f"Backup folder {DROPBOX_BACKUP_FOLDER} not found in Dropbox")
+        # List the whole backup folder recursively, so all senders' files are
+        # found in one paginated listing rather than one listing per sender
+        entries = list_files_in_dropbox_folder(dbx, DROPBOX_BACKUP_FOLDER, recursive=True)
+        if not entries:
+            logger.error(f"Backup folder {DROPBOX_BACKUP_FOLDER} not found in Dropbox or empty")
             return 0
         
-        # Get all sender folders in the backup folder
-        sender_folders = list_dropbox_files(dbx, DROPBOX_BACKUP_FOLDER)
+        prefix_length = len(DROPBOX_BACKUP_FOLDER) + 1
+        local_sender_paths = set()
+        for entry in entries:
+            if not isinstance(entry, dropbox.files.FileMetadata) or not entry.name.endswith('.json'):
+                continue
+            
+            # Only restore files directly inside a sender folder
+            relative_parts = entry.path_display[prefix_length:].split('/')
+            if len(relative_parts) != 2:
+                continue
+            
+            local_sender_path = os.path.join(DATA_DIR, relative_parts[0])
+            if local_sender_path not in local_sender_paths:
+                os.makedirs(local_sender_path, exist_ok=True)
+                local_sender_paths.add(local_sender_path)
+            
+            tasks.append((
+                entry.path_display, os.path.join(local_sender_path, entry.name),
+                entry.size, entry.content_hash
+            ))
         
-        for folder in sender_folders:
-            if isinstance(folder, dropbox.files.FolderMetadata):
-                sender_name = folder.name
-                dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender_name}"
-                local_sender_path = os.path.join(DATA_DIR, sender_name)
-                
-                # Get all files in this sender folder
-                sender_files = list_dropbox_files(dbx, dropbox_sender_path)
-                
-                for file in sender_files:
-                    if isinstance(file, dropbox.files.FileMetadata) and file.name.endswith('.json'):
-                        dropbox_file_path = f"{dropbox_sender_path}/{file.name}"
-                        local_file_path = os.path.join(local_sender_path, file.name)
-                        
-                        if restore_file(dbx, dropbox_file_path, local_file_path):
-                            success_count += 1
+        # Download the files in parallel using the shared client
+        success_count = transfer_files(restore_file, dbx, tasks, workers)
         
         logger.info(f"Restore complete. Successfully restored {success_count} files.")
         return success_count
@@ -980,40 +1710,91 @@ def restore_all_data():
         logger.error(f"Error during restore: {str(e)}")
         return 0
 
-def restore_specific_sender(sender):
+def restore_sender_from_zip(dbx, dropbox_sender_path, local_sender_path):
+    """
+    Restore a sender's JSON files by downloading their Dropbox folder as a
+    single zip archive instead of one request per file.
+    
+    Args:
+        dbx: Dropbox client instance
+        dropbox_sender_path (str): The sender folder in Dropbox
+        local_sender_path (str): The local sender directory to extract into
+        
+    Returns:
+        int: Number of files restored
+    """
+    logger.info(f"Restoring {dropbox_sender_path} as a zip archive")
+    
+    _, response = call_dropbox(dbx.files_download_zip, dropbox_sender_path)
+    os.makedirs(local_sender_path, exist_ok=True)
+    
+    restored_count = 0
+    with response, tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_SIZE) as archive_file:
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            archive_file.write(chunk)
+        archive_file.seek(0)
+        
+        with zipfile.ZipFile(archive_file) as archive:
+            for member in archive.infolist():
+                # Entries are named "<sender>/<file>"; only take the JSON files
+                # directly inside the sender folder
+                parts = member.filename.split('/')
+                if len(parts) != 2 or not parts[1].endswith('.json'):
+                    continue
+                
+                local_file_path = os.path.join(local_sender_path, parts[1])
+                temp_path = local_file_path + ".part"
+                with archive.open(member) as source, open(temp_path, 'wb') as target:
+                    shutil.copyfileobj(source, target, RESTORE_BUFFER_SIZE)
+                os.replace(temp_path, local_file_path)
+                restored_count += 1
+    
+    return restored_count
+
+def restore_specific_sender(sender, workers=None):
     """
     Restore all data for a specific sender from Dropbox.
+    
+    Args:
+        sender (str): The sender whose files should be restored
+        workers (int, optional): Number of parallel downloads, defaults to DROPBOX_SYNC_WORKERS
+        
     Returns the number of files successfully restored.
     """
     try:
         # Get Dropbox client
         dbx = get_dropbox_client()
         
-        # Check if sender folder exists in Dropbox
         dropbox_sender_path = f"{DROPBOX_BACKUP_FOLDER}/{sender}"
-        try:
-            dbx.files_get_metadata(dropbox_sender_path)
-        except ApiError:
-            logger.error(f"Sender folder {dropbox_sender_path} not found in Dropbox")
-            return 0
-        
-        # Track successful restores
-        success_count = 0
-        
-        # Get all files in this sender folder
-        sender_files = list_dropbox_files(dbx, dropbox_sender_path)
-        
-        # Prepare local sender directory
         local_sender_path = os.path.join(DATA_DIR, sender)
-        os.makedirs(local_sender_path, exist_ok=True)
         
-        for file in sender_files:
-            if isinstance(file, dropbox.files.FileMetadata) and file.name.endswith('.json'):
-                dropbox_file_path = f"{dropbox_sender_path}/{file.name}"
-                local_file_path = os.path.join(local_sender_path, file.name)
-                
-                if restore_file(dbx, dropbox_file_path, local_file_path):
-                    success_count += 1
+        # Download the whole folder as one zip, or file by file if that fails
+        # (e.g. when the folder is over the zip download limits). The zip
+        # download also tells us if the sender folder doesn't exist, so no
+        # separate existence check is needed.
+        try:
+            success_count = restore_sender_from_zip(dbx, dropbox_sender_path, local_sender_path)
+        except Exception as e:
+            if (isinstance(e, ApiError) and isinstance(e.error, dropbox.files.DownloadZipError) and
+                    e.error.is_path() and e.error.get_path().is_not_found()):
+                logger.error(f"Sender folder {dropbox_sender_path} not found in Dropbox")
+                return 0
+            
+            logger.warning(f"Zip download of {dropbox_sender_path} failed, restoring files one by one: {str(e)}")
+            
+            # Get all files in this sender folder
+            sender_files = list_dropbox_files(dbx, dropbox_sender_path)
+            
+            tasks = []
+            for file in sender_files:
+                if isinstance(file, dropbox.files.FileMetadata) and file.name.endswith('.json'):
+                    dropbox_file_path = f"{dropbox_sender_path}/{file.name}"
+                    local_file_path = os.path.join(local_sender_path, file.name)
+                    tasks.append((dropbox_file_path, local_file_path, file.size, file.content_hash))
+            
+            # Download the files in parallel using the shared client
+            os.makedirs(local_sender_path, exist_ok=True)
+            success_count = transfer_files(restore_file, dbx, tasks, workers)
         
         logger.info(f"Restore complete for sender {sender}. Successfully restored {success_count} files.")
         return success_count
@@ -1049,20 +1830,24 @@ if __name__ == "__main__":
     group.add_argument("--backup-file", nargs=2, metavar=("SENDER", "SUBMISSION_ID"), help="Backup a specific file")
     group.add_argument("--schedule", action="store_true", help="Run as a scheduled job")
     group.add_argument("--test-connection", action="store_true", help="Test Dropbox connection")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Number of files to transfer in parallel (default: {DROPBOX_SYNC_WORKERS})")
+    parser.add_argument("--verify", action="store_true",
+                        help="With --backup, check each uploaded file's content hash against the local file")
     
     args = parser.parse_args()
     
     try:
         if args.backup:
-            backed_up = backup_all_data()
+            backed_up = backup_all_data(workers=args.workers, verify=args.verify)
             print(f"Backup completed: {backed_up} files backed up")
         
         elif args.restore:
-            restored = restore_all_data()
+            restored = restore_all_data(workers=args.workers)
             print(f"Restore completed: {restored} files restored")
         
         elif args.restore_sender:
-            restored = restore_specific_sender(args.restore_sender)
+            restored = restore_specific_sender(args.restore_sender, workers=args.workers)
             print(f"Restore completed for {args.restore_sender}: {restored} files restored")
         
         elif args.backup_file:
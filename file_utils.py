@@ -0,0 +1,48 @@
+"""
+File helpers shared by the web app, the Dropbox modules and the sync worker.
+"""
+
+import os
+import threading
+
+def atomic_temp_path(file_path):
+    """
+    Get the temporary path a file is written to before being renamed into place.
+    It sits next to the target (so the rename stays on one filesystem) and is
+    unique per process and thread, so concurrent writers never share it.
+
+    Args:
+        file_path (str): The final path of the file
+
+    Returns:
+        str: The temporary path
+    """
+    return f"{file_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+
+def write_file_atomic(file_path, content, fsync=True):
+    """
+    Write bytes to a file atomically.
+    Data goes to a temporary file first and is then renamed over the target,
+    so concurrent readers never see a partially written file and a crash
+    mid-write never leaves a truncated one behind.
+
+    Args:
+        file_path (str): Path of the file to write
+        content (bytes): The new content of the file
+        fsync (bool): Flush the data to disk before the rename, so the file
+            survives a power loss as well. Skip it for files that can be
+            rebuilt, such as caches.
+    """
+    tmp_path = atomic_temp_path(file_path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except Exception:
+        # Don't leave stray temporary files behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,62 @@
+"""
+Gunicorn configuration for Webhook Data Viewer
+
+Gunicorn picks this file up automatically from the working directory.
+
+The defaults match the docker-compose command (--workers 2 --threads 2).
+Flags given on the command line take precedence over this file.
+
+Everything that talks to Dropbox (the cached client, the rate limiter and
+the batch uploader) lives in process memory, so each worker holds its own
+client and rate-limit bucket and only batches the submissions it receives
+itself. Deployments that see bursts of webhooks can run a single worker with
+more threads instead, so all requests share one bucket and one batch:
+
+    GUNICORN_WORKERS=1 GUNICORN_THREADS=8 gunicorn app:app
+"""
+
+import os
+import sys
+import signal
+
+# Number of worker processes (see above for running a single worker)
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+
+# Threads per worker that handle requests concurrently
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+
+def _signal_dropbox_shutdown():
+    """Wake threads waiting between Dropbox retries so the worker can exit"""
+    dropbox_sync = sys.modules.get('dropbox_sync')
+    if dropbox_sync is not None:
+        dropbox_sync.shutdown_event.set()
+
+def post_worker_init(worker):
+    """
+    Signal shutdown as soon as the worker is asked to stop gracefully.
+    atexit handlers only run once request and background threads have been
+    joined, which is too late to cut their retry waits short.
+    """
+    previous_handler = signal.getsignal(signal.SIGTERM)
+    
+    def handle_term(signum, frame):
+        _signal_dropbox_shutdown()
+        if callable(previous_handler):
+            previous_handler(signum, frame)
+    
+    signal.signal(signal.SIGTERM, handle_term)
+
+def worker_int(worker):
+    """Signal shutdown when the worker is interrupted (SIGINT/SIGQUIT)"""
+    _signal_dropbox_shutdown()
+
+def worker_exit(server, worker):
+    """
+    Signal shutdown when the worker exits for any other reason, and write the
+    sync status updates still queued in the app before the process is gone
+    """
+    _signal_dropbox_shutdown()
+    app = sys.modules.get('app')
+    if app is not None:
+        app.flush_sync_status_updates()
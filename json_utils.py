@@ -0,0 +1,85 @@
+"""
+JSON helpers shared by the web app and the sync worker.
+
+Uses orjson when installed and falls back to the standard library for
+anything orjson would get wrong, such as integers larger than 64 bits.
+"""
+
+import os
+import re
+import json
+import mmap
+
+# Use orjson for faster JSON (de)serialization if available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# A run of 19 or more digits may be an integer beyond 64 bits, which orjson
+# would parse as a float
+LONG_DIGIT_RUN_PATTERN = re.compile(rb'\d{19}')
+
+# Local files larger than this are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 64 * 1024
+
+def dump_json_bytes(data, indent=False, sort_keys=False, default=None):
+    """
+    Serialize data to JSON bytes, using orjson when installed and falling
+    back to the standard library for anything orjson can't handle, such as
+    integers larger than 64 bits.
+
+    Args:
+        data: The data to serialize
+        indent (bool): Indent the output by two spaces instead of writing it compactly
+        sort_keys (bool): Write object keys in sorted order
+        default (callable, optional): Converts values JSON has no type for.
+            When given, dates and dataclasses are passed to it as well rather
+            than encoded in orjson's own format.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        option = 0
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if default is not None:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        try:
+            return orjson.dumps(data, default=default, option=option or None)
+        except TypeError:
+            pass
+    return json.dumps(
+        data,
+        indent=2 if indent else None,
+        separators=None if indent else (',', ':'),
+        sort_keys=sort_keys,
+        default=default
+    ).encode('utf-8')
+
+def load_json_bytes(content):
+    """
+    Parse JSON from bytes (or a buffer), using orjson when installed.
+    Content that may hold integers beyond 64 bits is parsed with the standard
+    library instead, so they are returned exactly as stored.
+    """
+    if ORJSON_AVAILABLE and not LONG_DIGIT_RUN_PATTERN.search(content):
+        return orjson.loads(content)
+    return json.loads(bytes(content))
+
+def load_json_file(file_path):
+    """
+    Load a JSON file from local storage.
+    Large files are memory-mapped so they are parsed straight from the page
+    cache instead of being copied into a decoded string first.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    return load_json_bytes(view)
+        return load_json_bytes(f.read())
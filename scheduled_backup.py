@@ -16,7 +16,6 @@ import os
 import sys
 import time
 import logging
-from pathlib import Path
 
 # Setup basic logging
 logging.basicConfig(
@@ -28,10 +27,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger("scheduled-backup")
 
+# Directory containing this script and the app's .env and data
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
 def main():
     """Run the scheduled backup process"""
     logger.info("Starting scheduled backup...")
     
+    # Make sure we're in the correct directory before importing dropbox_sync,
+    # which loads .env and opens its log file relative to it
+    os.chdir(SCRIPT_DIR)
+    
     # Check if the dropbox_sync module is available
     try:
         import dropbox_sync
@@ -39,10 +45,6 @@ def main():
         logger.error("dropbox_sync module not found. Please check your installation.")
         return 1
     
-    # Make sure we're in the correct directory
-    script_dir = Path(__file__).parent.absolute()
-    os.chdir(script_dir)
-    
     # Run the backup
     try:
         start_time = time.time()
@@ -19,33 +19,111 @@ import sys
 import time
 import logging
 import json
+import mmap
 import argparse
 import datetime
-import hashlib
+import functools
 import threading
-from pathlib import Path
+import contextlib
+
+from json_utils import MMAP_THRESHOLD, dump_json_bytes, load_json_bytes, load_json_file
+from file_utils import atomic_temp_path, write_file_atomic
+
+# Use kernel advisory locks for the sync lock where available (not on Windows)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# Directory containing this script; the app's files are resolved against it
+# rather than the working directory
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Setup basic logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler("sync_worker.log"),
+        logging.FileHandler(os.path.join(SCRIPT_DIR, "sync_worker.log")),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger("sync-worker")
 
 # Constants
-SYNC_LOCK_FILE = ".sync_in_progress"
-SYNC_STATUS_FILE = "sync_status.json"
+SYNC_LOCK_FILE = os.path.join(SCRIPT_DIR, ".sync_in_progress")
+SYNC_STATUS_FILE = os.path.join(SCRIPT_DIR, "sync_status.json")
+
+# Number of past syncs kept in the status file's history
+SYNC_HISTORY_LENGTH = 10
+
+# Per-sender index of synced files, so unchanged files can be skipped without
+# parsing them. It has no .json suffix so it is never taken for a submission.
+SYNC_INDEX_FILE = ".sync_index"
+
+# Number of files uploaded or downloaded in parallel
+SYNC_WORKERS = int(os.getenv("DROPBOX_SYNC_WORKERS", "8"))
+
+# File descriptor holding the flock on SYNC_LOCK_FILE while a sync runs
+sync_lock_fd = None
+
+# Locked around every read-modify-write of the status file, which both the
+# sync and the web app's status updates write
+SYNC_STATUS_LOCK_FILE = SYNC_STATUS_FILE + ".lock"
+sync_status_local_lock = threading.Lock()
+
+def load_dropbox_sync_info(file_path):
+    """
+    Read the Dropbox sync marker (_sync.dropbox) of a local submission.
+    Files whose raw bytes don't mention "_sync" have never been synced and
+    are not parsed at all.
+    
+    Args:
+        file_path (str): Path of the local JSON file
+        
+    Returns:
+        dict: The sync marker, or None if the file has none
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b'"_sync"') == -1:
+                    return None
+                with memoryview(mm) as view:
+                    file_data = load_json_bytes(view)
+        else:
+            content = f.read()
+            if b'"_sync"' not in content:
+                return None
+            file_data = load_json_bytes(content)
+    
+    return file_data.get('_sync', {}).get('dropbox')
+
+@contextlib.contextmanager
+def sync_status_lock():
+    """
+    Hold the sync status lock while reading and rewriting the status file,
+    so concurrent updates from other threads or processes aren't lost.
+    Without fcntl only threads of the same process are excluded.
+    """
+    with sync_status_local_lock:
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        
+        fd = os.open(SYNC_STATUS_LOCK_FILE, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
 
 def get_sync_status():
     """Get the current synchronization status"""
     if os.path.exists(SYNC_STATUS_FILE):
         try:
-            with open(SYNC_STATUS_FILE, 'r') as f:
-                return json.load(f)
+            return load_json_file(SYNC_STATUS_FILE)
         except Exception as e:
             logger.error(f"Error reading sync status file: {str(e)}")
     
@@ -100,20 +178,82 @@ def update_sync_status(status, start_time=None, end_time=None, success=None,
                 "errors": errors if errors else []
             }
             
-            # Keep last 10 entries in history
-            updated_status["history"] = [history_entry] + updated_status.get("history", [])[:9]
+            # Keep the most recent entries in history, newest first
+            history = updated_status.get("history", [])
+            updated_status["history"] = [history_entry, *history[:SYNC_HISTORY_LENGTH - 1]]
         
-        # Write the updated status
-        with open(SYNC_STATUS_FILE, 'w') as f:
-            json.dump(updated_status, f, indent=2)
+        # Written atomically, so a crash mid-write never leaves a truncated
+        # status file
+        write_file_atomic(SYNC_STATUS_FILE, dump_json_bytes(updated_status))
         
         return updated_status
     except Exception as e:
         logger.error(f"Error updating sync status file: {str(e)}")
         return status
 
+def load_sync_index(sender_path):
+    """
+    Load the sync index of a sender directory.
+    
+    Args:
+        sender_path (str): Path of the local sender directory
+        
+    Returns:
+        dict: Submission ID -> {verified, timestamp, mtime, size}, empty if
+            the index is missing or unreadable
+    """
+    try:
+        return load_json_file(os.path.join(sender_path, SYNC_INDEX_FILE))
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable sync index in {sender_path}: {str(e)}")
+        return {}
+
+def save_sync_index(sender_path, index):
+    """
+    Atomically write the sync index of a sender directory.
+    
+    Args:
+        sender_path (str): Path of the local sender directory
+        index (dict): Submission ID -> {verified, timestamp, mtime, size}
+    """
+    try:
+        # The index is only a cache and is rebuilt if lost, so skip the fsync
+        write_file_atomic(os.path.join(sender_path, SYNC_INDEX_FILE), dump_json_bytes(index), fsync=False)
+    except Exception as e:
+        logger.warning(f"Could not write sync index in {sender_path}: {str(e)}")
+
 def acquire_sync_lock():
     """Acquire a lock for synchronization to prevent concurrent syncs"""
+    global sync_lock_fd
+    
+    if FCNTL_AVAILABLE:
+        # The kernel releases the lock when the holder exits, so there are no
+        # stale locks to detect and no race between processes clearing one
+        try:
+            fd = os.open(SYNC_LOCK_FILE, os.O_CREAT | os.O_RDWR, 0o644)
+        except Exception as e:
+            logger.error(f"Error acquiring sync lock: {str(e)}")
+            return False
+        
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            logger.warning("Sync already in progress, cannot acquire lock")
+            return False
+        except Exception as e:
+            os.close(fd)
+            logger.error(f"Error acquiring sync lock: {str(e)}")
+            return False
+        
+        # Record the holder for anyone inspecting the lock file
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()} {datetime.datetime.now().isoformat()}".encode())
+        sync_lock_fd = fd
+        return True
+    
     try:
         if os.path.exists(SYNC_LOCK_FILE):
             # Check if the lock is stale (older than 1 hour)
@@ -136,7 +276,17 @@ def acquire_sync_lock():
 
 def release_sync_lock():
     """Release the synchronization lock"""
+    global sync_lock_fd
+    
     try:
+        if sync_lock_fd is not None:
+            # Leave the lock file in place; removing it would let another
+            # process lock a new file while a third still waits on the old one
+            fcntl.flock(sync_lock_fd, fcntl.LOCK_UN)
+            os.close(sync_lock_fd)
+            sync_lock_fd = None
+            return True
+        
         if os.path.exists(SYNC_LOCK_FILE):
             os.remove(SYNC_LOCK_FILE)
         return True
@@ -157,6 +307,7 @@ def sync_to_dropbox(verify=True, force=False, debug=False):
         dict: Synchronization results
     """
     try:
+        import dropbox
         import dropbox_sync
     except ImportError:
         logger.error("dropbox_sync module not found. Please check your installation.")
@@ -168,10 +319,6 @@ def sync_to_dropbox(verify=True, force=False, debug=False):
             "errors": ["Import error: dropbox_sync module not found"]
         }
     
-    # Ensure we're in the right directory (app root)
-    script_dir = Path(__file__).parent.absolute()
-    os.chdir(script_dir)
-    
     # Make sure the data directory exists
     data_dir = dropbox_sync.DATA_DIR
     if not os.path.exists(data_dir):
@@ -220,12 +367,23 @@ def sync_to_dropbox(verify=True, force=False, debug=False):
             return result
         
         # Process all sender directories
-        senders = [d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d))]
+        with os.scandir(data_dir) as entries:
+            senders = [(entry.name, entry.path) for entry in entries if entry.is_dir()]
         logger.info(f"Found {len(senders)} sender directories to process")
         
-        for sender in senders:
-            sender_path = os.path.join(data_dir, sender)
-            
+        # Files that need syncing, as (sender, submission ID, local path, Dropbox path, size) tuples
+        pending_files = []
+        
+        # Sync index of each sender, and the senders whose index changed
+        sync_indexes = {}
+        changed_indexes = set()
+        
+        # Files whose sync has expired but which are unchanged since they were
+        # uploaded, to be checked against the Dropbox content hash instead of
+        # being uploaded again. Same tuples as pending_files.
+        recheck_files = []
+        
+        for sender, sender_path in senders:
             # Create sender folder in Dropbox if needed
             dropbox_sender_path = f"{dropbox_sync.DROPBOX_BACKUP_FOLDER}/{sender}"
             try:
@@ -242,53 +400,167 @@ def sync_to_dropbox(verify=True, force=False, debug=False):
                 continue
             
             # Process JSON files in this sender directory
-            json_files = [f for f in os.listdir(sender_path) if f.endswith('.json')]
+            with os.scandir(sender_path) as entries:
+                json_files = [entry for entry in entries if entry.name.endswith('.json') and entry.is_file()]
             logger.info(f"Found {len(json_files)} JSON files for sender {sender}")
             
-            for json_file in json_files:
-                local_file_path = os.path.join(sender_path, json_file)
+            sync_index = sync_indexes[sender] = load_sync_index(sender_path)
+            
+            for file_entry in json_files:
+                json_file = file_entry.name
+                local_file_path = file_entry.path
                 submission_id = json_file.replace('.json', '')
+                file_stat = file_entry.stat()
                 
                 # Check if the file has already been synced (unless force=True)
                 needs_sync = True
+                needs_recheck = False
                 if not force:
                     try:
-                        with open(local_file_path, 'r') as f:
-                            file_data = json.load(f)
-                            
-                        if '_sync' in file_data and 'dropbox' in file_data['_sync']:
-                            sync_info = file_data['_sync']['dropbox']
-                            
-                            # Check if it's been verified and not too old (< 1 day)
-                            if sync_info.get('verified', False):
-                                sync_time = datetime.datetime.fromisoformat(sync_info['timestamp'])
-                                now = datetime.datetime.now()
-                                if (now - sync_time).total_seconds() < 86400:  # 24 hours
-                                    logger.info(f"Skipping already synced file: {json_file}")
-                                    needs_sync = False
+                        # Use the indexed sync info while the file is unchanged,
+                        # otherwise read it from the file itself
+                        sync_info = sync_index.get(submission_id)
+                        file_unchanged = bool(
+                            sync_info and sync_info.get('mtime') == file_stat.st_mtime
+                            and sync_info.get('size') == file_stat.st_size
+                        )
+                        if not file_unchanged:
+                            sync_info = load_dropbox_sync_info(local_file_path)
+                            if sync_info:
+                                sync_index[submission_id] = {
+                                    'verified': sync_info.get('verified', False),
+                                    'timestamp': sync_info['timestamp'],
+                                    'mtime': file_stat.st_mtime,
+                                    'size': file_stat.st_size
+                                }
+                                changed_indexes.add(sender)
+                        
+                        # Check if it's been verified and not too old (< 1 day)
+                        if sync_info and sync_info.get('verified', False):
+                            sync_time = datetime.datetime.fromisoformat(sync_info['timestamp'])
+                            now = datetime.datetime.now()
+                            if (now - sync_time).total_seconds() < 86400:  # 24 hours
+                                logger.info(f"Skipping already synced file: {json_file}")
+                                needs_sync = False
+                            elif file_unchanged and sync_info.get('content_hash'):
+                                needs_recheck = True
                     except Exception as e:
                         logger.warning(f"Error checking sync status for {json_file}: {str(e)}")
                 
                 if needs_sync:
-                    logger.info(f"Syncing file: {json_file}")
-                    
-                    # Use the enhanced backup function with retry and verification
-                    backup_result = dropbox_sync.backup_specific_file(
-                        sender, 
-                        submission_id, 
-                        debug=debug,
-                        verify_upload=verify,
-                        max_retries=3
+                    (recheck_files if needs_recheck else pending_files).append((
+                        sender, submission_id, local_file_path,
+                        f"{dropbox_sender_path}/{json_file}", file_stat.st_size
+                    ))
+        
+        # Expired files that are unchanged locally only need uploading if the
+        # copy in Dropbox no longer matches what was uploaded. One recursive
+        # listing gives the content hash of every file in the backup.
+        if recheck_files:
+            try:
+                server_hashes = {
+                    entry.path_lower: entry.content_hash
+                    for entry in dropbox_sync.list_files_in_dropbox_folder(
+                        dbx, dropbox_sync.DROPBOX_BACKUP_FOLDER, recursive=True
                     )
-                    
-                    if backup_result['success']:
-                        logger.info(f"Successfully synced {json_file} to Dropbox")
-                        result["files_synced"] += 1
-                    else:
-                        error_msg = f"Failed to sync {json_file}: {backup_result.get('error', 'Unknown error')}"
-                        logger.error(error_msg)
-                        result["errors"].append(error_msg)
-                        result["files_failed"] += 1
+                    if isinstance(entry, dropbox.files.FileMetadata)
+                }
+            except Exception as e:
+                logger.warning(f"Could not list Dropbox backup for content hashes: {str(e)}")
+                server_hashes = {}
+            
+            for pending_file in recheck_files:
+                sender, submission_id, _, dropbox_file_path, _ = pending_file
+                sync_info = sync_indexes[sender][submission_id]
+                if server_hashes.get(dropbox_file_path.lower()) == sync_info['content_hash']:
+                    logger.info(f"Skipping unchanged file: {submission_id}.json")
+                    sync_info['timestamp'] = datetime.datetime.now().isoformat()
+                    changed_indexes.add(sender)
+                else:
+                    pending_files.append(pending_file)
+        
+        def index_synced_file(sender, submission_id, local_file_path, verified, content_hash=None):
+            """Record a freshly synced file, and the content hash uploaded, in its sender's sync index"""
+            try:
+                file_stat = os.stat(local_file_path)
+            except OSError:
+                return
+            sync_indexes[sender][submission_id] = {
+                'verified': verified,
+                'timestamp': datetime.datetime.now().isoformat(),
+                'mtime': file_stat.st_mtime,
+                'size': file_stat.st_size,
+                'content_hash': content_hash
+            }
+            changed_indexes.add(sender)
+        
+        # Upload small files in parallel and commit them together in batches,
+        # instead of one upload round trip and commit per file
+        batch_tasks = [
+            (local_file_path, dropbox_file_path)
+            for _, _, local_file_path, dropbox_file_path, file_size in pending_files
+            if file_size <= dropbox_sync.BATCH_UPLOAD_MAX_SIZE
+        ]
+        logger.info(f"Syncing {len(pending_files)} files, {len(batch_tasks)} of them in batches")
+        committed_paths = set(dropbox_sync.upload_files_batched(dbx, batch_tasks, verify=verify))
+        
+        # Large files and any the batch didn't commit (or failed to verify)
+        # go through the single-file backup with its own retries
+        retry_tasks = []
+        for sender, submission_id, local_file_path, dropbox_file_path, _ in pending_files:
+            if local_file_path not in committed_paths:
+                retry_tasks.append((sender, submission_id))
+                continue
+            
+            json_file = f"{submission_id}.json"
+            content_hash = None
+            try:
+                # The file still holds the uploaded content until the sync
+                # marker is added, so hash it on the way
+                with open(local_file_path, 'rb') as f:
+                    file_content = f.read()
+                content_hash = dropbox_sync.dropbox_content_hash(file_content)
+                dropbox_sync.record_dropbox_sync(
+                    local_file_path, dropbox_file_path, verify, file_content=file_content
+                )
+            except Exception as e:
+                logger.warning(f"Could not update sync status in {json_file}: {str(e)}")
+            index_synced_file(sender, submission_id, local_file_path, verify, content_hash)
+            
+            logger.info(f"Successfully synced {json_file} to Dropbox")
+            result["files_synced"] += 1
+        
+        def backup_file(dbx, sender, submission_id):
+            logger.info(f"Syncing file: {submission_id}.json")
+            return dropbox_sync.backup_specific_file(
+                sender, 
+                submission_id, 
+                debug=debug,
+                verify_upload=verify,
+                max_retries=3
+            )
+        
+        workers = max(1, min(SYNC_WORKERS, len(retry_tasks)))
+        for (sender, submission_id), future in dropbox_sync.run_in_parallel(backup_file, dbx, retry_tasks, workers):
+            json_file = f"{submission_id}.json"
+            backup_result = future.result()
+            
+            if backup_result['success']:
+                index_synced_file(
+                    sender, submission_id, os.path.join(data_dir, sender, json_file),
+                    backup_result.get('verified', False),
+                    backup_result['details'].get('local_file_hash')
+                )
+                logger.info(f"Successfully synced {json_file} to Dropbox")
+                result["files_synced"] += 1
+            else:
+                error_msg = f"Failed to sync {json_file}: {backup_result.get('error', 'Unknown error')}"
+                logger.error(error_msg)
+                result["errors"].append(error_msg)
+                result["files_failed"] += 1
+        
+        for sender in changed_indexes:
+            save_sync_index(os.path.join(data_dir, sender), sync_indexes[sender])
         
         # Set overall success status
         if result["files_failed"] == 0:
@@ -305,6 +577,126 @@ def sync_to_dropbox(verify=True, force=False, debug=False):
         result["errors"].append(error_msg)
         return result
 
+def get_local_mtimes(sender_path):
+    """
+    Get the modification times of a local sender directory's JSON files.
+    
+    Args:
+        sender_path (str): Path of the local sender directory
+        
+    Returns:
+        dict: File name -> modification time, empty if the directory is missing
+    """
+    mtimes = {}
+    try:
+        with os.scandir(sender_path) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    try:
+                        mtimes[entry.name] = entry.stat().st_mtime
+                    except OSError:
+                        pass
+    except FileNotFoundError:
+        pass
+    return mtimes
+
+def download_file(dbx, dropbox_file_path, local_file_path, verify=True):
+    """
+    Download a single file for sync_from_dropbox and add sync metadata to it.
+    
+    Args:
+        dbx: Dropbox client instance
+        dropbox_file_path (str): Path of the file in Dropbox
+        local_file_path (str): Destination path of the local file
+        verify (bool): Whether to verify the downloaded file
+        
+    Returns:
+        str: An error message, or None if the download succeeded
+    """
+    import dropbox_sync
+    
+    filename = os.path.basename(local_file_path)
+    logger.info(f"Downloading {filename} from Dropbox")
+    
+    # Large files are streamed here first; it is named apart from the
+    # temporary file write_file_atomic uses for the final write
+    tmp_path = atomic_temp_path(f"{local_file_path}.download")
+    
+    try:
+        # Download the file into a temporary file that is swapped into place
+        # once complete, so a failed download never leaves a truncated
+        # submission behind
+        def fetch():
+            metadata, response = dbx.files_download(dropbox_file_path)
+            with response:
+                if metadata.size <= dropbox_sync.RESTORE_BUFFER_SIZE:
+                    return metadata, response.content, None
+                
+                # Large file: stream it to disk one buffer at a time, hashing
+                # as it goes, instead of holding the whole response in memory
+                hasher = dropbox_sync.DropboxContentHasher() if verify else None
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(dropbox_sync.RESTORE_BUFFER_SIZE):
+                        if hasher:
+                            hasher.update(chunk)
+                        f.write(chunk)
+                return metadata, None, hasher
+        
+        # The body is read inside the call, so a connection dropped while
+        # streaming is retried along with the request itself
+        metadata, file_content, hasher = dropbox_sync.call_dropbox(fetch)
+        sync_metadata = {
+            'timestamp': datetime.datetime.now().isoformat(),
+            'path': dropbox_file_path,
+            'verified': verify,
+            'server_modified': metadata.server_modified.isoformat()
+        }
+        
+        if file_content is not None:
+            # Small file: verify and add the sync metadata in memory,
+            # so the file is only written once
+            if verify and dropbox_sync.dropbox_content_hash(file_content) != metadata.content_hash:
+                return f"Verification failed for {filename} - hash mismatch"
+            
+            try:
+                # Parse with the standard library, which keeps integers
+                # beyond 64 bits exact, since the file is rewritten
+                file_data = json.loads(file_content)
+                file_data.setdefault('_sync', {})['dropbox_downloaded'] = sync_metadata
+                file_content = dump_json_bytes(file_data, indent=True)
+            except Exception as e:
+                logger.warning(f"Error adding sync metadata to {filename}: {str(e)}")
+            
+            write_file_atomic(local_file_path, file_content)
+        else:
+            if hasher and hasher.hexdigest() != metadata.content_hash:
+                os.remove(tmp_path)
+                return f"Verification failed for {filename} - hash mismatch"
+            
+            # Add sync metadata to the streamed file, or keep it as downloaded
+            # if it can't be parsed
+            try:
+                with open(tmp_path, 'rb') as f:
+                    file_data = json.load(f)
+                file_data.setdefault('_sync', {})['dropbox_downloaded'] = sync_metadata
+                file_content = dump_json_bytes(file_data, indent=True)
+            except Exception as e:
+                logger.warning(f"Error adding sync metadata to {filename}: {str(e)}")
+            
+            if file_content is not None:
+                write_file_atomic(local_file_path, file_content)
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, local_file_path)
+        
+        logger.info(f"Successfully downloaded {filename} from Dropbox")
+        return None
+        
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return f"Error downloading {filename}: {str(e)}"
+
 def sync_from_dropbox(verify=True, force=False, debug=False):
     """
     Synchronize data from Dropbox to local storage
@@ -318,6 +710,7 @@ def sync_from_dropbox(verify=True, force=False, debug=False):
         dict: Synchronization results
     """
     try:
+        import dropbox
         import dropbox_sync
     except ImportError:
         logger.error("dropbox_sync module not found. Please check your installation.")
@@ -329,10 +722,6 @@ def sync_from_dropbox(verify=True, force=False, debug=False):
             "errors": ["Import error: dropbox_sync module not found"]
         }
     
-    # Ensure we're in the right directory (app root)
-    script_dir = Path(__file__).parent.absolute()
-    os.chdir(script_dir)
-    
     # Make sure the data directory exists
     data_dir = dropbox_sync.DATA_DIR
     if not os.path.exists(data_dir):
@@ -362,128 +751,89 @@ def sync_from_dropbox(verify=True, force=False, debug=False):
         
         # Check if backup folder exists in Dropbox
         try:
-            dbx.files_get_metadata(dropbox_sync.DROPBOX_BACKUP_FOLDER)
+            dropbox_sync.call_dropbox(dbx.files_get_metadata, dropbox_sync.DROPBOX_BACKUP_FOLDER)
         except Exception as e:
             error_msg = f"Backup folder {dropbox_sync.DROPBOX_BACKUP_FOLDER} not found in Dropbox"
             logger.error(error_msg)
             result["errors"].append(error_msg)
             return result
         
-        # Get all sender folders in Dropbox
+        # List the whole backup folder recursively, so all senders' files are
+        # found in one paginated listing rather than one listing per sender
         try:
-            folder_content = dropbox_sync.list_dropbox_files(dbx, dropbox_sync.DROPBOX_BACKUP_FOLDER)
-            sender_folders = [f for f in folder_content if isinstance(f, dropbox.files.FolderMetadata)]
-            logger.info(f"Found {len(sender_folders)} sender folders in Dropbox")
+            entries = dropbox_sync.list_files_in_dropbox_folder(
+                dbx, dropbox_sync.DROPBOX_BACKUP_FOLDER, recursive=True
+            )
         except Exception as e:
             error_msg = f"Error listing folders in Dropbox: {str(e)}"
             logger.error(error_msg)
             result["errors"].append(error_msg)
             return result
         
-        # Process each sender folder
-        for folder in sender_folders:
-            sender_name = folder.name
-            dropbox_sender_path = f"{dropbox_sync.DROPBOX_BACKUP_FOLDER}/{sender_name}"
-            local_sender_path = os.path.join(data_dir, sender_name)
+        # Files to download, as (Dropbox path, local path) tuples
+        download_tasks = []
+        
+        # Local modification times of each sender's files, by file name
+        local_mtimes = {}
+        
+        prefix_length = len(dropbox_sync.DROPBOX_BACKUP_FOLDER) + 1
+        for entry in entries:
+            # Only sender folders and the files directly inside them
+            relative_parts = entry.path_display[prefix_length:].split('/')
             
-            # Ensure local sender directory exists
-            if not os.path.exists(local_sender_path):
-                os.makedirs(local_sender_path)
-                logger.info(f"Created local sender directory: {local_sender_path}")
+            if isinstance(entry, dropbox.files.FolderMetadata):
+                if len(relative_parts) == 1 and relative_parts[0]:
+                    # Ensure local sender directory exists
+                    local_sender_path = os.path.join(data_dir, entry.name)
+                    if not os.path.exists(local_sender_path):
+                        os.makedirs(local_sender_path)
+                        logger.info(f"Created local sender directory: {local_sender_path}")
+                continue
             
-            # Get all files in this sender folder
-            try:
-                sender_files = dropbox_sync.list_dropbox_files(dbx, dropbox_sender_path)
-                json_files = [f for f in sender_files if isinstance(f, dropbox.files.FileMetadata) and f.name.endswith('.json')]
-                logger.info(f"Found {len(json_files)} JSON files for sender {sender_name} in Dropbox")
-            except Exception as e:
-                error_msg = f"Error listing files for sender {sender_name}: {str(e)}"
-                logger.error(error_msg)
-                result["errors"].append(error_msg)
+            if (not isinstance(entry, dropbox.files.FileMetadata) or len(relative_parts) != 2
+                    or not entry.name.endswith('.json')):
                 continue
             
-            # Process each JSON file
-            for file in json_files:
-                filename = file.name
-                dropbox_file_path = f"{dropbox_sender_path}/{filename}"
-                local_file_path = os.path.join(local_sender_path, filename)
-                
-                # Check if we should download this file
-                needs_download = force or not os.path.exists(local_file_path)
-                
-                # If file exists locally, check if Dropbox version is newer
-                if not needs_download and not force:
-                    try:
-                        local_mtime = os.path.getmtime(local_file_path)
-                        dropbox_mtime = file.server_modified.timestamp()
-                        
-                        if dropbox_mtime > local_mtime:
-                            logger.info(f"Dropbox version of {filename} is newer than local")
-                            needs_download = True
-                    except Exception as e:
-                        logger.warning(f"Error comparing file times for {filename}: {str(e)}")
-                        needs_download = True
+            sender_name = relative_parts[0]
+            filename = entry.name
+            dropbox_file_path = entry.path_display
+            local_file_path = os.path.join(data_dir, sender_name, filename)
+            
+            # Download the file if it is missing locally or the Dropbox
+            # version is newer, using one directory scan per sender for the
+            # local modification times
+            needs_download = True
+            if not force:
+                sender_mtimes = local_mtimes.get(sender_name)
+                if sender_mtimes is None:
+                    sender_mtimes = local_mtimes[sender_name] = get_local_mtimes(
+                        os.path.join(data_dir, sender_name)
+                    )
                 
-                if needs_download:
-                    logger.info(f"Downloading {filename} from Dropbox")
-                    
-                    try:
-                        # Download the file
-                        metadata, response = dbx.files_download(dropbox_file_path)
-                        file_content = response.content
-                        
-                        # Calculate hash for verification
-                        dropbox_hash = None
-                        if verify:
-                            dropbox_hash = hashlib.md5(file_content).hexdigest()
-                        
-                        # Write to local file
-                        with open(local_file_path, 'wb') as f:
-                            f.write(file_content)
-                        
-                        # Verify if requested
-                        if verify:
-                            try:
-                                with open(local_file_path, 'rb') as f:
-                                    local_hash = hashlib.md5(f.read()).hexdigest()
-                                
-                                if local_hash != dropbox_hash:
-                                    error_msg = f"Verification failed for {filename} - hash mismatch"
-                                    logger.error(error_msg)
-                                    result["errors"].append(error_msg)
-                                    result["files_failed"] += 1
-                                    continue
-                            except Exception as e:
-                                logger.warning(f"Error verifying downloaded file {filename}: {str(e)}")
-                        
-                        # Add sync metadata to the file
-                        try:
-                            with open(local_file_path, 'r') as f:
-                                file_data = json.load(f)
-                            
-                            if '_sync' not in file_data:
-                                file_data['_sync'] = {}
-                            
-                            file_data['_sync']['dropbox_downloaded'] = {
-                                'timestamp': datetime.datetime.now().isoformat(),
-                                'path': dropbox_file_path,
-                                'verified': verify,
-                                'server_modified': metadata.server_modified.isoformat()
-                            }
-                            
-                            with open(local_file_path, 'w') as f:
-                                json.dump(file_data, f, indent=2)
-                        except Exception as e:
-                            logger.warning(f"Error adding sync metadata to {filename}: {str(e)}")
-                        
-                        logger.info(f"Successfully downloaded {filename} from Dropbox")
-                        result["files_synced"] += 1
-                        
-                    except Exception as e:
-                        error_msg = f"Error downloading {filename}: {str(e)}"
-                        logger.error(error_msg)
-                        result["errors"].append(error_msg)
-                        result["files_failed"] += 1
+                local_mtime = sender_mtimes.get(filename)
+                if local_mtime is not None:
+                    # server_modified is a naive UTC datetime
+                    dropbox_mtime = entry.server_modified.replace(tzinfo=datetime.timezone.utc).timestamp()
+                    needs_download = dropbox_mtime > local_mtime
+                    if needs_download:
+                        logger.info(f"Dropbox version of {filename} is newer than local")
+            
+            if needs_download:
+                download_tasks.append((dropbox_file_path, local_file_path))
+        
+        logger.info(f"Found {len(download_tasks)} JSON files to download from Dropbox")
+        
+        # Download the files in parallel using the shared client
+        workers = max(1, min(SYNC_WORKERS, len(download_tasks)))
+        for (dropbox_file_path, local_file_path), future in dropbox_sync.run_in_parallel(
+                functools.partial(download_file, verify=verify), dbx, download_tasks, workers):
+            error_msg = future.result()
+            if error_msg:
+                logger.error(error_msg)
+                result["errors"].append(error_msg)
+                result["files_failed"] += 1
+            else:
+                result["files_synced"] += 1
         
         # Set overall success status
         if result["files_failed"] == 0:
@@ -561,13 +911,12 @@ def run_sync(direction="both", verify=True, force=False, debug=False):
             "locked": True
         }
     
-    # Get current status
-    status = get_sync_status()
-    
     try:
-        # Mark sync as in progress
+        # Mark sync as in progress. Every update re-reads the status file under
+        # the status lock, so updates the web app made meanwhile are kept.
         start_time = datetime.datetime.now()
-        status = update_sync_status(status, start_time=start_time, in_progress=True)
+        with sync_status_lock():
+            update_sync_status(get_sync_status(), start_time=start_time, in_progress=True)
         
         # Run the appropriate sync based on direction
         if direction == "both":
@@ -581,14 +930,15 @@ def run_sync(direction="both", verify=True, force=False, debug=False):
         
         # Update the sync status
         end_time = datetime.datetime.now()
-        status = update_sync_status(
-            status,
-            end_time=end_time,
-            success=result["success"],
-            errors=result.get("errors", []),
-            files_synced=result.get("total_synced", result.get("files_synced", 0)),
-            in_progress=False
-        )
+        with sync_status_lock():
+            update_sync_status(
+                get_sync_status(),
+                end_time=end_time,
+                success=result["success"],
+                errors=result.get("errors", []),
+                files_synced=result.get("total_synced", result.get("files_synced", 0)),
+                in_progress=False
+            )
         
         return result
     
@@ -598,13 +948,14 @@ def run_sync(direction="both", verify=True, force=False, debug=False):
         
         # Update status with error
         end_time = datetime.datetime.now()
-        status = update_sync_status(
-            status,
-            end_time=end_time,
-            success=False,
-            errors=[error_msg],
-            in_progress=False
-        )
+        with sync_status_lock():
+            update_sync_status(
+                get_sync_status(),
+                end_time=end_time,
+                success=False,
+                errors=[error_msg],
+                in_progress=False
+            )
         
         return {
             "success": False,